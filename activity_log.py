@@ -0,0 +1,157 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import insert, update
+
+from app import app, db
+from models import User, UserActivity
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityWriter:
+    """
+    Buffers activity log entries in memory and writes them in batches.
+
+    Requests only append to a bounded queue; a background thread inserts the
+    queued rows with one multi-row INSERT per batch, either every
+    flush_interval seconds or as soon as batch_size rows are waiting. When the
+    queue is full new entries are dropped, so a slow database never blocks
+    requests. Pending entries are flushed when the process exits.
+    """
+
+    def __init__(self, max_queue_size=None, batch_size=None, flush_interval=None):
+        self.max_queue_size = max_queue_size or app.config.get('ACTIVITY_QUEUE_SIZE', 10000)
+        self.batch_size = batch_size or app.config.get('ACTIVITY_BATCH_SIZE', 100)
+        self.flush_interval = flush_interval or app.config.get('ACTIVITY_FLUSH_INTERVAL', 2)
+        self.written = 0
+        self.dropped = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._atexit_registered = False
+        logger.debug("Activity writer initialized")
+
+    def record(self, user_id, activity_type, details=None):
+        """
+        Queue an activity log entry.
+
+        Args:
+            user_id: ID of the user
+            activity_type: Type of activity
+            details: Optional details string
+
+        Returns:
+            bool: False if the queue was full and the entry was dropped
+        """
+        row = {
+            'user_id': user_id,
+            'activity_type': activity_type,
+            'details': details,
+            'timestamp': datetime.utcnow()
+        }
+
+        with self._lock:
+            if len(self._pending) >= self.max_queue_size:
+                self.dropped += 1
+                logger.warning(f"Activity queue full, dropped {activity_type} for user {user_id}")
+                return False
+            self._pending.append(row)
+            batch_ready = len(self._pending) >= self.batch_size
+
+        self._ensure_running()
+        if batch_ready:
+            self._wake.set()
+        return True
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Write every queued entry to the database. Needs an application context.
+
+        Returns:
+            int: Number of entries written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch:
+                    break
+
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    logger.error(f"Error writing activity log batch: {str(e)}")
+                    self._requeue(batch)
+                    break
+                written += len(batch)
+
+        self.written += written
+        return written
+
+    def start(self):
+        """Start the background flush thread if it isn't running in this process."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            # A forked worker inherits the queue object but not the thread
+            self._pid = os.getpid()
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self):
+        """Stop the flush thread and write whatever is still queued."""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        with app.app_context():
+            self.flush()
+
+    def _ensure_running(self):
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with app.app_context():
+                self.flush()
+
+    def _write(self, batch):
+        users = User.__table__
+        with db.engine.begin() as conn:
+            conn.execute(insert(UserActivity.__table__).values(batch))
+            # Core inserts skip the session's before_flush hook, so bump the
+            # data versions here to invalidate dashboard caches and ETags
+            conn.execute(
+                update(users)
+                .where(users.c.id.in_({row['user_id'] for row in batch}))
+                .values(data_version=users.c.data_version + 1)
+            )
+
+    def _requeue(self, batch):
+        # Put a failed batch back at the front, as far as the bound allows
+        with self._lock:
+            room = max(self.max_queue_size - len(self._pending), 0)
+            kept = batch[:room]
+            self._pending.extendleft(reversed(kept))
+            self.dropped += len(batch) - len(kept)
@@ -0,0 +1,353 @@
+import logging
+from datetime import datetime
+
+from flask import request, jsonify, redirect, url_for, flash
+from flask_login import login_required, current_user
+
+from app import app, db, login_manager
+from models import Task, UserPreference
+from routes import (
+    task_scheduler, ml_prioritizer, calendar_integration,
+    record_activity, publish_task_event
+)
+from task_pagination import paginate_tasks, DEFAULT_PAGE_SIZE
+from conditional_get import conditional_on_data_version
+from task_sync import get_task_changes, DEFAULT_CHANGES_LIMIT
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/v1'
+
+# Maximum number of operations accepted in one bulk request
+MAX_BULK_OPERATIONS = 1000
+
+TASK_STATUSES = ('pending', 'completed', 'cancelled')
+DATETIME_FIELDS = ('due_date', 'start_time', 'end_time')
+
+# Task times are stored as naive server-local datetimes; the bounds leave room
+# for the arithmetic done on them (default times, reminders, end times)
+MIN_DATETIME = datetime(1900, 1, 1)
+MAX_DATETIME = datetime(9999, 1, 1)
+
+# Longest duration accepted, in minutes (a year)
+MAX_DURATION = 366 * 24 * 60
+
+# Maximum length of free-text task fields (None for unbounded), as in models.Task
+TEXT_FIELD_LENGTHS = {'title': 120, 'description': None, 'category': 50}
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def _is_int(value):
+    # JSON true/false arrive as bool, which is a subclass of int
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+@login_manager.unauthorized_handler
+def unauthorized():
+    # API clients get a status code instead of the login page
+    if request.path.startswith('/api/'):
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    flash(login_manager.login_message, login_manager.login_message_category)
+    return redirect(url_for(login_manager.login_view, next=request.url))
+
+
+def parse_task_fields(data, partial=False):
+    """
+    Validate and convert task fields from a JSON payload.
+
+    Args:
+        data: Dictionary of task fields
+        partial: True for updates, where every field is optional
+
+    Returns:
+        dict: Task data understood by TaskScheduler
+
+    Raises:
+        ValidationError: If a field is missing or invalid
+    """
+    if not isinstance(data, dict):
+        raise ValidationError("'task' must be an object")
+
+    task_data = {}
+
+    # Anything that reaches the session must be valid, or the flush fails
+    # and rolls back every other operation of a bulk request
+    for field, max_length in TEXT_FIELD_LENGTHS.items():
+        if field in data and data[field] is not None:
+            if not isinstance(data[field], str):
+                raise ValidationError(f"'{field}' must be a string")
+            if max_length and len(data[field]) > max_length:
+                raise ValidationError(f"'{field}' must be at most {max_length} characters")
+
+    if 'title' in data or not partial:
+        title = (data.get('title') or '').strip()
+        if not title:
+            raise ValidationError("'title' is required")
+        task_data['title'] = title
+
+    for field in ('description', 'category'):
+        if field in data:
+            task_data[field] = data[field]
+
+    if 'priority' in data:
+        priority = data['priority']
+        if not _is_int(priority) or not 0 <= priority <= 5:
+            raise ValidationError("'priority' must be an integer between 0 and 5")
+        task_data['priority'] = priority
+
+    if 'status' in data:
+        if data['status'] not in TASK_STATUSES:
+            raise ValidationError(f"'status' must be one of {', '.join(TASK_STATUSES)}")
+        task_data['status'] = data['status']
+
+    for field in DATETIME_FIELDS:
+        if field in data:
+            value = data[field]
+            try:
+                value = datetime.fromisoformat(value) if value else None
+            except (TypeError, ValueError):
+                raise ValidationError(f"'{field}' must be an ISO 8601 date-time")
+            if value is not None and value.tzinfo is not None:
+                # "...+02:00" is converted to server-local time
+                value = value.astimezone().replace(tzinfo=None)
+            if value is not None and not MIN_DATETIME <= value < MAX_DATETIME:
+                raise ValidationError(f"'{field}' must be between years {MIN_DATETIME.year} and {MAX_DATETIME.year - 1}")
+            task_data[field] = value
+
+    if 'duration' in data:
+        if not _is_int(data['duration']) or not 0 < data['duration'] <= MAX_DURATION:
+            raise ValidationError(f"'duration' must be a positive number of minutes, at most {MAX_DURATION}")
+        task_data['duration'] = data['duration']
+
+    return task_data
+
+
+@app.route(f'{API_PREFIX}/tasks', methods=['GET'])
+@login_required
+@conditional_on_data_version
+def api_list_tasks():
+    query = Task.query.filter_by(user_id=current_user.id)
+
+    status_filter = request.args.get('status', 'all')
+    if status_filter != 'all':
+        query = query.filter_by(status=status_filter)
+
+    try:
+        tasks, next_cursor = paginate_tasks(
+            query,
+            request.args.get('after'),
+            request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'tasks': [t.to_summary_dict() for t in tasks],
+        'next_cursor': next_cursor
+    })
+
+
+@app.route(f'{API_PREFIX}/tasks/<int:task_id>', methods=['GET'])
+@login_required
+@conditional_on_data_version
+def api_get_task(task_id):
+    task = Task.query.filter_by(id=task_id, user_id=current_user.id).first()
+    if not task:
+        return jsonify({'success': False, 'message': 'Task not found'}), 404
+    return jsonify({'success': True, 'task': task.to_dict()})
+
+
+@app.route(f'{API_PREFIX}/tasks/changes', methods=['GET'])
+@login_required
+@conditional_on_data_version
+def api_task_changes():
+    """
+    Delta sync: tasks written and deleted since the client's cursor.
+
+    Call without `since` for a full sync, then pass back the returned cursor;
+    keep calling while `has_more` is true. `scores` holds the new
+    ml_priority_score of tasks the server rescored since the cursor.
+    """
+    try:
+        changes = get_task_changes(
+            current_user,
+            request.args.get('since'),
+            request.args.get('limit', DEFAULT_CHANGES_LIMIT, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    return jsonify(dict(changes, success=True))
+
+
+@app.route(f'{API_PREFIX}/tasks/bulk', methods=['POST'])
+@login_required
+def api_bulk_tasks():
+    """
+    Apply many create/update/delete operations in one transaction.
+
+    Body: {"operations": [{"op": "create", "task": {...}},
+                          {"op": "update", "id": 1, "task": {...}},
+                          {"op": "delete", "id": 2}],
+           "sync_calendar": true}
+
+    Invalid operations are reported per item and skipped; valid ones are
+    committed together.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        payload = {}
+    operations = payload.get('operations')
+
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'message': "'operations' must be a non-empty list"}), 400
+    if len(operations) > MAX_BULK_OPERATIONS:
+        return jsonify({
+            'success': False,
+            'message': f"At most {MAX_BULK_OPERATIONS} operations are allowed per request"
+        }), 400
+
+    results = process_bulk_operations(
+        current_user,
+        operations,
+        sync_calendar=payload.get('sync_calendar', True)
+    )
+
+    return jsonify({
+        'success': all(r['status'] == 'ok' for r in results),
+        'results': results
+    })
+
+
+def process_bulk_operations(user, operations, sync_calendar=True):
+    """
+    Validate and apply bulk task operations for a user.
+
+    Args:
+        user: The User object
+        operations: List of operation dictionaries
+        sync_calendar: Whether to push created/updated tasks to Google Calendar
+
+    Returns:
+        list: One result dictionary per operation, in request order
+    """
+    user_prefs = UserPreference.query.filter_by(user_id=user.id).first()
+
+    # Load every task referenced by an update or delete in one query
+    referenced_ids = {
+        op.get('id') for op in operations
+        if isinstance(op, dict) and _is_int(op.get('id'))
+    }
+    existing = {}
+    if referenced_ids:
+        existing = {
+            task.id: task for task in Task.query.filter(
+                Task.user_id == user.id,
+                Task.id.in_(referenced_ids)
+            )
+        }
+
+    results = []
+    created, updated, deleted = [], [], []
+    deleted_ids = set()
+
+    for index, op in enumerate(operations):
+        result = {'index': index, 'op': op.get('op') if isinstance(op, dict) else None}
+        try:
+            if not isinstance(op, dict):
+                raise ValidationError("Operation must be an object")
+
+            if op.get('op') == 'create':
+                task_data = parse_task_fields(op.get('task'))
+                task = task_scheduler.build_task(user, task_data, user_prefs)
+                db.session.add(task)
+                created.append((result, task))
+
+            elif op.get('op') in ('update', 'delete'):
+                if not _is_int(op.get('id')):
+                    raise ValidationError("'id' must be an integer")
+                task = existing.get(op['id'])
+                if task is None or task.id in deleted_ids:
+                    raise ValidationError(f"Task {op.get('id')} not found")
+
+                if op['op'] == 'update':
+                    task_data = parse_task_fields(op.get('task'), partial=True)
+                    task_scheduler.apply_task_updates(task, task_data)
+                    if task not in updated:
+                        updated.append(task)
+                else:
+                    deleted.append(task.to_dict())
+                    deleted_ids.add(task.id)
+                    db.session.delete(task)
+                result['id'] = task.id
+
+            else:
+                raise ValidationError("'op' must be one of create, update, delete")
+
+            result['status'] = 'ok'
+        except ValidationError as e:
+            result['status'] = 'error'
+            result['message'] = str(e)
+        results.append(result)
+
+    updated = [task for task in updated if task.id not in deleted_ids]
+    created_tasks = [task for _, task in created]
+    changed = created_tasks + updated
+
+    try:
+        # Assign ids, then score and create reminders for all changed tasks at once
+        db.session.flush()
+
+        if changed:
+            user_tasks = Task.query.filter_by(user_id=user.id).all()
+            scores = ml_prioritizer.prioritize_tasks(changed, user_tasks)
+            for task, score in zip(changed, scores):
+                task.ml_priority_score = score
+
+        task_scheduler.replace_reminders(changed)
+        changed_ids = [task.id for task in changed]
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Bulk task operation failed: {str(e)}")
+        for result in results:
+            if result['status'] == 'ok':
+                result['status'] = 'error'
+                result['message'] = 'Transaction rolled back'
+        return results
+
+    # The commit expired every task; reload them with one query instead of one each
+    if changed:
+        Task.query.filter(Task.id.in_(changed_ids)).all()
+
+    for result, task in created:
+        result['id'] = task.id
+        result['task'] = task.to_dict()
+    for result in results:
+        if result['status'] == 'ok' and result['op'] == 'update':
+            result['task'] = existing[result['id']].to_dict()
+
+    # Calendar calls are external round-trips, so they run after the commit
+    if sync_calendar and changed and user_prefs and user_prefs.calendar_connected and user_prefs.calendar_credentials:
+        for task in changed:
+            if task.calendar_event_id:
+                calendar_integration.update_calendar_event(user_prefs.calendar_credentials, task)
+            else:
+                event_id = calendar_integration.create_calendar_event(user_prefs.calendar_credentials, task)
+                if event_id:
+                    task.calendar_event_id = event_id
+        db.session.commit()
+
+    if changed or deleted:
+        record_activity('bulk_tasks', f"{len(created_tasks)} created, {len(updated)} updated, {len(deleted)} deleted")
+        publish_task_event('bulk', {
+            'created': len(created_tasks),
+            'updated': len(updated),
+            'deleted': len(deleted)
+        })
+
+    return results
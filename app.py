@@ -6,6 +6,7 @@ from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_login import LoginManager
 from flask_mail import Mail
+from flask_migrate import Migrate
 
 
 class Base(DeclarativeBase):
@@ -16,6 +17,7 @@ class Base(DeclarativeBase):
 db = SQLAlchemy(model_class=Base)
 login_manager = LoginManager()
 mail = Mail()
+migrate = Migrate()
 
 # Create the app
 app = Flask(__name__)
@@ -38,11 +40,65 @@ app.config["MAIL_USERNAME"] = os.environ.get("MAIL_USERNAME")
 app.config["MAIL_PASSWORD"] = os.environ.get("MAIL_PASSWORD")
 app.config["MAIL_DEFAULT_SENDER"] = os.environ.get("MAIL_DEFAULT_SENDER")
 
+# Configure reminders (minutes ahead that a digest may pull reminders forward)
+app.config["REMINDER_DIGEST_WINDOW"] = int(os.environ.get("REMINDER_DIGEST_WINDOW", 30))
+
+# Configure background jobs (seconds)
+app.config["SCHEDULER_ENABLED"] = os.environ.get("SCHEDULER_ENABLED", "1") == "1"
+app.config["SCHEDULER_LEASE_TTL"] = int(os.environ.get("SCHEDULER_LEASE_TTL", 90))
+app.config["SCHEDULER_TICK_INTERVAL"] = int(os.environ.get("SCHEDULER_TICK_INTERVAL", 15))
+
+# Configure live events (whether pages subscribe to /api/events, seconds between
+# polls for events published by other processes, and how long published events
+# are kept for them). gunicorn.conf.py turns them off for thread-based workers.
+app.config["LIVE_EVENTS_ENABLED"] = os.environ.get("LIVE_EVENTS_ENABLED", "1") == "1"
+app.config["EVENT_POLL_INTERVAL"] = float(os.environ.get("EVENT_POLL_INTERVAL", 1))
+app.config["EVENT_RETENTION"] = int(os.environ.get("EVENT_RETENTION", 300))
+
+# Configure caching (number of users whose dashboard is kept in memory)
+app.config["DASHBOARD_CACHE_SIZE"] = int(os.environ.get("DASHBOARD_CACHE_SIZE", 1000))
+
+# Configure the buffered activity log (queue bound, rows per INSERT, seconds between flushes)
+app.config["ACTIVITY_QUEUE_SIZE"] = int(os.environ.get("ACTIVITY_QUEUE_SIZE", 10000))
+app.config["ACTIVITY_BATCH_SIZE"] = int(os.environ.get("ACTIVITY_BATCH_SIZE", 100))
+app.config["ACTIVITY_FLUSH_INTERVAL"] = float(os.environ.get("ACTIVITY_FLUSH_INTERVAL", 2))
+
+# Configure the assistant parse cache (entries, and their estimated total size in bytes)
+app.config["NLP_CACHE_SIZE"] = int(os.environ.get("NLP_CACHE_SIZE", 10000))
+app.config["NLP_CACHE_MAX_BYTES"] = int(os.environ.get("NLP_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+
+# Configure bulk natural-language import (texts per spaCy batch, parsing processes)
+app.config["NLP_IMPORT_BATCH_SIZE"] = int(os.environ.get("NLP_IMPORT_BATCH_SIZE", 64))
+app.config["NLP_IMPORT_PROCESSES"] = int(os.environ.get("NLP_IMPORT_PROCESSES", 1))
+
+# Configure metrics (bearer token Prometheus uses to scrape /admin/metrics)
+app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN")
+
+# Configure the N+1 query detector (on by default in debug mode)
+app.config["QUERY_INSPECTOR_ENABLED"] = {"1": True, "0": False}.get(os.environ.get("QUERY_INSPECTOR_ENABLED", ""))
+app.config["QUERY_REPEAT_THRESHOLD"] = int(os.environ.get("QUERY_REPEAT_THRESHOLD", 3))
+
+# Configure on-demand request profiling (see request_profiler.py)
+app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR")
+app.config["PROFILE_TOKEN"] = os.environ.get("PROFILE_TOKEN")
+app.config["PROFILE_SAMPLE_RATE"] = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+app.config["PROFILE_MODE"] = os.environ.get("PROFILE_MODE", "cprofile")  # cprofile or sample
+app.config["PROFILE_MAX_FILES"] = int(os.environ.get("PROFILE_MAX_FILES", 200))
+
+# Configure conditional GETs (set ETAG_SALT to the release id so a deploy invalidates ETags)
+app.config["ETAGS_ENABLED"] = os.environ.get("ETAGS_ENABLED", "1") == "1"
+app.config["ETAG_SALT"] = os.environ.get("ETAG_SALT")
+
 # Initialize extensions with app
 db.init_app(app)
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 mail.init_app(app)
+migrate.init_app(
+    app, db,
+    directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'),
+    render_as_batch=True  # SQLite needs batch mode for ALTER
+)
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -50,10 +106,6 @@ logger = logging.getLogger(__name__)
 
 
 with app.app_context():
-    # Import models
+    # Import models so they are registered with SQLAlchemy and Alembic.
+    # The schema itself is managed by migrations: run `flask --app main db upgrade`.
     import models  # noqa: F401
-    
-    # Create all tables
-    db.create_all()
-    
-    logger.debug("Database tables created")
@@ -0,0 +1,82 @@
+"""
+Golden corpus check and throughput benchmark for date_grammar.
+
+Every entry of date_corpus.jsonl holds a message, the reference time it is
+read at, and the dates/times it must produce. Entries that the previous
+multi-pattern extractor got wrong keep its output under "legacy", so the
+corpus documents each behavior change.
+
+    python benchmarks/date_grammar.py              # check the corpus, then benchmark
+    python benchmarks/date_grammar.py --seconds 10
+
+Exits with status 1 if any entry doesn't match.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from date_grammar import extract_dates_times  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'date_corpus.jsonl')
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def serialize(result):
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in sorted(result.items())}
+
+
+def check(corpus):
+    """
+    Compare the grammar's output with every corpus entry.
+
+    Returns:
+        int: Number of mismatches
+    """
+    failures = 0
+    for entry in corpus:
+        got = serialize(extract_dates_times(entry['text'].lower(), datetime.fromisoformat(entry['now'])))
+        if got != entry['expected']:
+            failures += 1
+            print(f"MISMATCH {entry['text']!r}\n  expected {entry['expected']}\n  got      {got}")
+
+    corrected = sum(1 for entry in corpus if 'legacy' in entry)
+    print(f"{len(corpus) - failures}/{len(corpus)} entries match "
+          f"({len(corpus) - corrected} as before, {corrected} corrected from the legacy extractor)")
+    return failures
+
+
+def benchmark(corpus, seconds):
+    texts = [(entry['text'].lower(), datetime.fromisoformat(entry['now'])) for entry in corpus]
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for text, now in texts:
+            extract_dates_times(text, now)
+        count += len(texts)
+    elapsed = time.perf_counter() - started
+    print(f"{count / elapsed:,.0f} messages/s ({elapsed / count * 1e6:.1f} us per message)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3, help='How long to run the benchmark')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    failures = check(corpus)
+    benchmark(corpus, args.seconds)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""
+Local load test for SmartScheduler.
+
+Seeds users with realistic task lists into a scratch database, serves the app
+in-process, and replays a weighted mix of user scenarios from concurrent
+clients. Google Calendar and SMTP are stubbed so only our own code is measured.
+
+    python benchmarks/loadtest.py --users 20 --concurrency 8 --duration 30
+    python benchmarks/loadtest.py --json results/v1.4.json
+    python benchmarks/loadtest.py --compare results/v1.4.json
+
+Reports throughput and p50/p95/p99 latency per scenario.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = ['work', 'personal', 'health', 'errands', 'learning', None]
+CATEGORY_WEIGHTS = [40, 20, 10, 10, 10, 10]
+STATUS_WEIGHTS = {'pending': 60, 'completed': 35, 'cancelled': 5}
+PRIORITY_WEIGHTS = [5, 15, 25, 25, 20, 10]  # priority 0-5
+
+TASK_TITLES = [
+    'Prepare quarterly report', 'Call the dentist', 'Review pull request', 'Team standup',
+    'Grocery shopping', 'Gym session', 'Read chapter 4', 'Pay electricity bill',
+    'Plan sprint', 'Email the landlord', 'Update resume', 'Write blog post'
+]
+
+ASSISTANT_COMMANDS = [
+    'Schedule a meeting with John tomorrow at 2pm',
+    'Remind me to call mom on Friday at 6pm',
+    'Show my tasks for today',
+    'What do I have this week?',
+    'How productive was I this week?',
+    'Add a high priority task to finish the report by Monday',
+]
+
+# Scenario name -> relative weight
+SCENARIO_WEIGHTS = {
+    'dashboard': 35,
+    'task_list': 20,
+    'task_api': 10,
+    'create_task': 15,
+    'assistant_command': 15,
+    'update_priorities': 5,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20, help='Users to seed')
+    parser.add_argument('--tasks-per-user', type=int, default=200, help='Average tasks per seeded user')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for data and scenarios')
+    parser.add_argument('--database-url', help='Database to seed (default: a scratch SQLite file)')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    parser.add_argument('--compare', help='Compare with results written by a previous --json run')
+    return parser.parse_args()
+
+
+def load_app(database_url):
+    # The app reads its configuration at import time
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['SCHEDULER_ENABLED'] = '0'
+    sys.path.insert(0, ROOT)
+
+    from flask_migrate import upgrade
+    import main  # noqa: F401  (registers every route)
+    from app import app
+    import routes
+
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+
+    stub_external_services(app, routes)
+    return app
+
+
+def stub_external_services(app, routes):
+    # Suppress SMTP delivery
+    app.extensions['mail'].suppress = True
+
+    # Calendar calls succeed instantly without touching Google
+    calendar = routes.calendar_integration
+    calendar.create_calendar_event = lambda creds, task: f"loadtest-{task.id}"
+    calendar.update_calendar_event = lambda creds, task: True
+    calendar.delete_calendar_event = lambda creds, event_id: True
+    calendar.sync_calendar_events = lambda *args, **kwargs: []
+
+
+def seed_users(app, count, tasks_per_user, rng):
+    """
+    Create users with a realistic spread of tasks.
+
+    Returns:
+        list: (username, password) of the seeded users
+    """
+    from app import db
+    from models import User, UserPreference, Task
+
+    now = datetime.utcnow()
+    credentials = []
+    statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+
+    with app.app_context():
+        for i in range(count):
+            username = f"loadtest{i}"
+            user = User.query.filter_by(username=username).first()
+            if user is None:
+                user = User(username=username, email=f"{username}@example.com")
+                user.set_password('loadtest')
+                db.session.add(user)
+                db.session.add(UserPreference(user=user, calendar_connected=i % 4 == 0,
+                                              calendar_credentials='{}' if i % 4 == 0 else None))
+                db.session.flush()
+
+                # Task counts vary a lot between users
+                n_tasks = max(1, int(rng.expovariate(1 / tasks_per_user)))
+                tasks = []
+                for _ in range(n_tasks):
+                    created_at = now - timedelta(days=rng.uniform(0, 90))
+                    status = rng.choices(statuses, status_weights)[0]
+                    due_date = None
+                    start_time = None
+                    if rng.random() < 0.85:
+                        due_date = now + timedelta(days=rng.uniform(-30, 30))
+                        due_date = due_date.replace(minute=0, second=0, microsecond=0)
+                        if rng.random() < 0.5:
+                            start_time = due_date.replace(hour=rng.randint(8, 18))
+                    tasks.append(Task(
+                        title=rng.choice(TASK_TITLES),
+                        description='Seeded by the load test',
+                        user_id=user.id,
+                        created_at=created_at,
+                        due_date=due_date,
+                        start_time=start_time,
+                        end_time=start_time + timedelta(minutes=rng.choice([30, 60, 90])) if start_time else None,
+                        priority=rng.choices(range(6), PRIORITY_WEIGHTS)[0],
+                        category=rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0],
+                        status=status,
+                        completed_at=created_at + timedelta(hours=rng.uniform(1, 72)) if status == 'completed' else None
+                    ))
+                db.session.add_all(tasks)
+                db.session.commit()
+            credentials.append((username, 'loadtest'))
+
+    return credentials
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Measure the request itself, not the page it redirects to
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    """One simulated user with its own session cookie."""
+
+    def __init__(self, base_url, username, password, rng):
+        self.base_url = base_url
+        self.rng = rng
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            NoRedirect()
+        )
+        self.request('POST', '/login', form={'username': username, 'password': password})
+
+    def request(self, method, path, form=None, json_body=None):
+        data = None
+        headers = {}
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def run_scenario(self, name):
+        if name == 'dashboard':
+            return self.request('GET', '/dashboard')
+        if name == 'task_list':
+            return self.request('GET', '/tasks?status=all')
+        if name == 'task_api':
+            return self.request('GET', '/api/v1/tasks?limit=50')
+        if name == 'create_task':
+            due = datetime.now() + timedelta(days=self.rng.randint(0, 14))
+            return self.request('POST', '/tasks/create', form={
+                'title': self.rng.choice(TASK_TITLES),
+                'description': '',
+                'due_date': due.strftime('%Y-%m-%d'),
+                'start_time': f"{self.rng.randint(8, 17):02d}:00",
+                'priority': str(self.rng.choices(range(6), PRIORITY_WEIGHTS)[0]),
+                'category': self.rng.choice(CATEGORIES) or ''
+            })
+        if name == 'assistant_command':
+            return self.request('POST', '/api/assistant/process', json_body={
+                'message': self.rng.choice(ASSISTANT_COMMANDS)
+            })
+        if name == 'update_priorities':
+            return self.request('POST', '/update-priorities')
+        raise ValueError(f"Unknown scenario {name}")
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_load(base_url, credentials, concurrency, duration, seed):
+    scenarios, weights = zip(*SCENARIO_WEIGHTS.items())
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        username, password = credentials[index % len(credentials)]
+        client = Client(base_url, username, password, rng)
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = client.run_scenario(scenario)
+            except Exception:
+                status = None
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[scenario].append(elapsed)
+                if status is None or status >= 400:
+                    errors[scenario] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for scenario, values in sorted(latencies.items()):
+        values.sort()
+        results[scenario] = {
+            'requests': len(values),
+            'errors': errors[scenario],
+            'rps': len(values) / elapsed,
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': values[-1] * 1000,
+        }
+    total = sum(r['requests'] for r in results.values())
+    return {'elapsed_seconds': elapsed, 'total_rps': total / elapsed, 'scenarios': results}
+
+
+def print_report(results, baseline=None):
+    print(f"\n{'scenario':<20}{'reqs':>8}{'errs':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for scenario, r in results['scenarios'].items():
+        line = (
+            f"{scenario:<20}{r['requests']:>8}{r['errors']:>6}{r['rps']:>9.1f}"
+            f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}"
+        )
+        previous = (baseline or {}).get('scenarios', {}).get(scenario)
+        if previous and previous['p95_ms']:
+            change = (r['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100
+            line += f"   p95 {change:+.0f}%"
+        print(line)
+
+    line = f"\ntotal: {results['total_rps']:.1f} req/s over {results['elapsed_seconds']:.1f}s"
+    if baseline and baseline.get('total_rps'):
+        change = (results['total_rps'] - baseline['total_rps']) / baseline['total_rps'] * 100
+        line += f" ({change:+.0f}% vs baseline)"
+    print(line)
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+
+    scratch_dir = None
+    database_url = args.database_url
+    if not database_url:
+        scratch_dir = tempfile.mkdtemp(prefix='smartscheduler-loadtest-')
+        database_url = f"sqlite:///{os.path.join(scratch_dir, 'loadtest.db')}"
+
+    app = load_app(database_url)
+    print(f"Seeding {args.users} users into {database_url} ...")
+    credentials = seed_users(app, args.users, args.tasks_per_user, rng)
+
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"Running {args.concurrency} clients for {args.duration:.0f}s against {base_url} ...")
+    try:
+        results = run_load(base_url, credentials, args.concurrency, args.duration, args.seed)
+    finally:
+        server.shutdown()
+
+    results['config'] = {
+        'users': args.users, 'tasks_per_user': args.tasks_per_user,
+        'concurrency': args.concurrency, 'duration': args.duration, 'seed': args.seed
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.json_path:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json_path)), exist_ok=True)
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
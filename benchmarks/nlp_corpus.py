@@ -0,0 +1,218 @@
+"""
+Accuracy and latency benchmark for the assistant's NLP pipeline.
+
+Every entry of nlp_corpus.jsonl holds a command and its correct reading:
+intent, task title and, where they apply, due date, start and end time,
+duration and priority. Fields an entry leaves out aren't scored; null means
+the field must be empty. Relative dates are read at REFERENCE_NOW, so the
+labels never go stale. The labels are what the command means, not what the
+parser currently returns, so accuracy below 100% marks known gaps.
+
+    python benchmarks/nlp_corpus.py                    # accuracy, then 5 timed passes
+    python benchmarks/nlp_corpus.py --verbose          # also list every mismatch
+    python benchmarks/nlp_corpus.py --json results/nlp-before.json
+    python benchmarks/nlp_corpus.py --compare results/nlp-before.json
+
+Needs the spaCy model (see SPACY_MODEL). The parse cache is disabled so every
+pass runs the full pipeline.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from nlp_processor import NLPProcessor, SPACY_MODEL  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nlp_corpus.jsonl')
+
+# A Wednesday morning
+REFERENCE_NOW = datetime(2026, 10, 14, 8, 30)
+
+FIELDS = ('intent', 'title', 'due_date', 'start_time', 'end_time', 'duration', 'priority')
+
+DATETIME_FIELDS = ('due_date', 'start_time', 'end_time')
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def normalize_title(title):
+    # Case, punctuation and spacing don't count
+    return " ".join(re.findall(r'\w+', (title or '').lower())) or None
+
+
+def read_fields(result):
+    """The scored fields of an understood command, in the corpus format."""
+    data = result['data']
+    fields = {
+        'intent': result['command_type'],
+        'title': normalize_title(data.get('title') or data.get('task_title')),
+        'duration': data.get('duration'),
+        'priority': data.get('priority'),
+    }
+    for field in DATETIME_FIELDS:
+        fields[field] = data[field].isoformat() if data.get(field) else None
+    return fields
+
+
+def title_f1(expected, got):
+    # Token overlap, so a title that is close but not exact still earns credit
+    expected_tokens, got_tokens = (expected or '').split(), (got or '').split()
+    common = sum(min(expected_tokens.count(t), got_tokens.count(t)) for t in set(expected_tokens))
+    if not common:
+        return 0.0
+    precision, recall = common / len(got_tokens), common / len(expected_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def evaluate(processor, corpus, verbose=False):
+    """
+    Score every labelled field of the corpus.
+
+    Returns:
+        dict: Per-field correct/total/accuracy, plus the mean title token F1
+    """
+    correct, total = defaultdict(int), defaultdict(int)
+    f1_scores = []
+    for entry in corpus:
+        got = read_fields(processor.analyze(entry['text'], REFERENCE_NOW).result)
+        expected = dict(entry['expected'])
+        if 'title' in expected:
+            expected['title'] = normalize_title(expected['title'])
+            f1_scores.append(title_f1(expected['title'], got['title']))
+
+        for field in FIELDS:
+            if field not in expected:
+                continue
+            total[field] += 1
+            if got[field] == expected[field]:
+                correct[field] += 1
+            elif verbose:
+                print(f"MISMATCH {field} in {entry['text']!r}: expected {expected[field]!r}, got {got[field]!r}")
+
+    accuracy = {
+        field: {'correct': correct[field], 'total': total[field], 'accuracy': correct[field] / total[field]}
+        for field in FIELDS if total[field]
+    }
+    return {'fields': accuracy, 'title_f1': sum(f1_scores) / len(f1_scores) if f1_scores else None}
+
+
+def measure(processor, corpus, passes):
+    """
+    Time every message through analyze, passes times over the corpus.
+
+    Returns:
+        dict: Per-stage latency percentiles (stages a message skips aren't
+              counted for it) and overall throughput
+    """
+    samples = defaultdict(list)
+    started = time.perf_counter()
+    for _ in range(passes):
+        for entry in corpus:
+            message_started = time.perf_counter()
+            command = processor.analyze(entry['text'], REFERENCE_NOW)
+            samples['total'].append(time.perf_counter() - message_started)
+            for stage, seconds in command.timings.items():
+                samples[stage].append(seconds)
+    elapsed = time.perf_counter() - started
+
+    stages = {}
+    for stage, values in samples.items():
+        values.sort()
+        stages[stage] = {
+            'calls': len(values),
+            'p50_us': percentile(values, 50) * 1e6,
+            'p95_us': percentile(values, 95) * 1e6,
+            'p99_us': percentile(values, 99) * 1e6,
+        }
+    return {'stages': stages, 'messages_per_second': len(samples['total']) / elapsed}
+
+
+def print_report(results, baseline=None):
+    baseline = baseline or {}
+
+    print(f"\n{'field':<12}{'correct':>9}{'total':>7}{'accuracy':>10}")
+    for field, r in results['accuracy']['fields'].items():
+        line = f"{field:<12}{r['correct']:>9}{r['total']:>7}{r['accuracy'] * 100:>9.1f}%"
+        previous = baseline.get('accuracy', {}).get('fields', {}).get(field)
+        if previous:
+            line += f"   {(r['accuracy'] - previous['accuracy']) * 100:+.1f} pts"
+        print(line)
+    if results['accuracy']['title_f1'] is not None:
+        print(f"title token F1: {results['accuracy']['title_f1']:.3f}")
+
+    # Slowest stages first, the end-to-end time last
+    stages = sorted(
+        (item for item in results['latency']['stages'].items() if item[0] != 'total'),
+        key=lambda item: -item[1]['p50_us']
+    ) + [('total', results['latency']['stages']['total'])]
+    print(f"\n{'stage':<12}{'calls':>8}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+    for stage, r in stages:
+        line = f"{stage:<12}{r['calls']:>8}{r['p50_us']:>10.1f}{r['p95_us']:>10.1f}{r['p99_us']:>10.1f}"
+        previous = baseline.get('latency', {}).get('stages', {}).get(stage)
+        if previous and previous['p95_us']:
+            change = (r['p95_us'] - previous['p95_us']) / previous['p95_us'] * 100
+            line += f"   p95 {change:+.0f}%"
+        print(line)
+
+    line = f"\n{results['latency']['messages_per_second']:,.0f} messages/s with {results['config']['model']}"
+    previous = baseline.get('latency', {}).get('messages_per_second')
+    if previous:
+        change = (results['latency']['messages_per_second'] - previous) / previous * 100
+        line += f" ({change:+.0f}% vs baseline)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--passes', type=int, default=5, help='Timed passes over the corpus')
+    parser.add_argument('--verbose', action='store_true', help='List every mismatched field')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    parser.add_argument('--compare', help='Compare with results written by a previous --json run')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    processor = NLPProcessor(cache_size=0)
+    # Load the model before anything is timed
+    processor.analyze('schedule a warm up tomorrow', REFERENCE_NOW)
+
+    results = {
+        'accuracy': evaluate(processor, corpus, verbose=args.verbose),
+        'latency': measure(processor, corpus, args.passes),
+        'config': {
+            'model': SPACY_MODEL, 'entries': len(corpus), 'passes': args.passes,
+            'reference_now': REFERENCE_NOW.isoformat()
+        },
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.json_path:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json_path)), exist_ok=True)
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime
+from functools import wraps
+
+from flask import request, session, make_response
+from flask_login import current_user
+
+from app import app
+
+logger = logging.getLogger(__name__)
+
+_template_salt = None
+
+
+def _default_salt():
+    # Hash of the templates, so a deploy that changes the markup changes every ETag
+    global _template_salt
+    if _template_salt is None:
+        digest = hashlib.sha1()
+        template_dir = os.path.join(app.root_path, app.template_folder)
+        for root, _, files in sorted(os.walk(template_dir)):
+            for name in sorted(files):
+                with open(os.path.join(root, name), 'rb') as f:
+                    digest.update(f.read())
+        _template_salt = digest.hexdigest()
+    return _template_salt
+
+
+def compute_etag(user):
+    """
+    Build the ETag of the current request for a user.
+
+    Everything a user-scoped page depends on is in the key: the view and its
+    arguments, the negotiated format, the user's data_version (bumped on every
+    task, preference and activity write) and score_version (bumped when tasks
+    are rescored), and today's date for date-relative
+    views. Computing it needs no query beyond loading the user.
+
+    Args:
+        user: The current User object
+
+    Returns:
+        str: Strong ETag value (without quotes)
+    """
+    key = json.dumps([
+        app.config.get('ETAG_SALT') or _default_salt(),
+        request.endpoint,
+        request.view_args,
+        sorted(request.args.items(multi=True)),
+        request.headers.get('Accept'),
+        user.id,
+        user.data_version,
+        user.score_version,
+        date.today().isoformat(),
+        datetime.utcnow().date().isoformat()
+    ], default=str)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _has_pending_flashes():
+    return bool(session.get('_flashes'))
+
+
+def conditional_on_data_version(view):
+    """
+    Answer If-None-Match with 304 before the view runs when the user's data
+    hasn't changed, and tag fresh responses with an ETag.
+
+    Must be applied below @login_required.
+    """
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        # Pages showing one-off flash messages can't be cached
+        if not app.config.get('ETAGS_ENABLED', True) or _has_pending_flashes():
+            return view(*args, **kwargs)
+
+        etag = compute_etag(current_user)
+        if etag in request.if_none_match:
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or _has_pending_flashes():
+                return response
+            # Recompute, the view may have written (and bumped the version) itself
+            response.set_etag(compute_etag(current_user))
+
+        # Let the browser keep the page, but revalidate it on every use
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.update(('Cookie', 'Accept'))
+        return response
+    return decorated
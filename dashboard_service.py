@@ -0,0 +1,163 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import and_, case, func, inspect, or_
+from sqlalchemy.orm import load_only
+
+from app import app, db
+from models import Task, UserPreference, UserActivity
+
+logger = logging.getLogger(__name__)
+
+# Task columns shown on the dashboard (the description is never displayed)
+DASHBOARD_TASK_COLUMNS = (
+    Task.id, Task.title, Task.due_date, Task.start_time, Task.end_time,
+    Task.priority, Task.status, Task.category
+)
+
+
+def _snapshot(obj, exclude=()):
+    """Copy an ORM object's loaded columns into a plain, session-independent object."""
+    unloaded = inspect(obj).unloaded
+    return SimpleNamespace(**{
+        column.key: getattr(obj, column.key)
+        for column in obj.__table__.columns
+        if column.key not in exclude and column.key not in unloaded
+    })
+
+
+def _nulls_first(value):
+    # Matches the database's ascending order with NULLs first
+    return (value is not None, value or datetime.min)
+
+
+class DashboardService:
+    """
+    Builds the dashboard with two queries and caches the result per user.
+
+    Cache entries are tagged with the user's data_version, which is bumped on
+    every task, preference or activity write, so a stale entry is detected
+    from the already-loaded current user without touching the database.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or app.config.get('DASHBOARD_CACHE_SIZE', 1000)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        logger.debug("Dashboard service initialized")
+
+    def get_dashboard(self, user):
+        """
+        Get the dashboard data for a user, from cache when still valid.
+
+        Args:
+            user: The User object
+
+        Returns:
+            dict: Template context for dashboard.html (without 'now')
+        """
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        key = (user.data_version, today)
+
+        with self._lock:
+            entry = self._cache.get(user.id)
+            if entry and entry[0] == key:
+                self._cache.move_to_end(user.id)
+                self.hits += 1
+                return entry[1]
+
+        data = self._load(user.id, today)
+
+        with self._lock:
+            self.misses += 1
+            self._cache[user.id] = (key, data)
+            self._cache.move_to_end(user.id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        return data
+
+    def invalidate(self, user_id):
+        """Drop the cached dashboard of a user."""
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def _load(self, user_id, today):
+        tomorrow = today + timedelta(days=1)
+
+        is_today = Task.due_date.between(today, tomorrow)
+        is_upcoming = and_(
+            Task.due_date > tomorrow,
+            Task.due_date <= tomorrow + timedelta(days=7),
+            Task.status == 'pending'
+        )
+        is_high_priority = and_(Task.status == 'pending', Task.priority >= 4)
+
+        # Query 1: every task the dashboard shows, tagged with the section(s) it
+        # belongs to, plus today's totals by conditional aggregation
+        rows = db.session.query(
+            Task,
+            case((is_today, 1), else_=0).label('in_today'),
+            case((is_upcoming, 1), else_=0).label('in_upcoming'),
+            case((is_high_priority, 1), else_=0).label('in_high_priority'),
+            func.sum(case((and_(is_today, Task.status == 'completed'), 1), else_=0)).over().label('completed_today'),
+            func.sum(case((is_today, 1), else_=0)).over().label('total_today')
+        ).options(
+            load_only(*DASHBOARD_TASK_COLUMNS)
+        ).filter(
+            Task.user_id == user_id,
+            or_(is_today, is_upcoming, is_high_priority)
+        ).all()
+
+        today_tasks, upcoming_tasks, high_priority_tasks = [], [], []
+        completed_today = total_today = 0
+        for task, in_today, in_upcoming, in_high_priority, completed, total in rows:
+            snapshot = _snapshot(task, exclude=('description', 'calendar_event_id'))
+            if in_today:
+                today_tasks.append(snapshot)
+            if in_upcoming:
+                upcoming_tasks.append(snapshot)
+            if in_high_priority:
+                high_priority_tasks.append(snapshot)
+            completed_today, total_today = int(completed or 0), int(total or 0)
+
+        today_tasks.sort(key=lambda t: _nulls_first(t.start_time))
+        upcoming_tasks.sort(key=lambda t: _nulls_first(t.due_date))
+        high_priority_tasks.sort(key=lambda t: _nulls_first(t.due_date))
+
+        # Query 2: preferences joined with the five most recent activities
+        pref_rows = db.session.query(UserPreference, UserActivity).outerjoin(
+            UserActivity, UserActivity.user_id == UserPreference.user_id
+        ).filter(
+            UserPreference.user_id == user_id
+        ).order_by(UserActivity.timestamp.desc()).limit(5).all()
+
+        if pref_rows:
+            user_preferences = _snapshot(pref_rows[0][0], exclude=('calendar_credentials',))
+            recent_activity = [_snapshot(activity) for _, activity in pref_rows if activity is not None]
+        else:
+            # No preference row yet, fall back to activity alone
+            user_preferences = None
+            recent_activity = [
+                _snapshot(activity) for activity in UserActivity.query.filter_by(
+                    user_id=user_id
+                ).order_by(UserActivity.timestamp.desc()).limit(5).all()
+            ]
+
+        completion_rate = round((completed_today / total_today * 100) if total_today > 0 else 0)
+
+        return {
+            'today_tasks': today_tasks,
+            'upcoming_tasks': upcoming_tasks,
+            'high_priority_tasks': high_priority_tasks,
+            'completion_rate': completion_rate,
+            'completed_today': completed_today,
+            'total_today': total_today,
+            'user_preferences': user_preferences,
+            'recent_activity': recent_activity
+        }
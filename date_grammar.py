@@ -0,0 +1,223 @@
+import re
+from datetime import datetime, timedelta
+
+# Mapping of day names to their index in a week (0-6, where 0 is Monday)
+DAY_NAME_TO_INDEX = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6
+}
+
+MONTH_PREFIX_TO_NUMBER = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+NAMED_TIMES = {
+    'morning': (9, 0),
+    'afternoon': (14, 0),
+    'evening': (18, 0),
+    'noon': (12, 0),
+    'midnight': (0, 0),
+}
+
+DURATION_UNIT_MINUTES = {
+    'min': 1, 'hour': 60, 'hr': 60, 'day': 24 * 60, 'week': 7 * 24 * 60
+}
+
+_DAY = r'monday|tuesday|wednesday|thursday|friday|saturday|sunday'
+_MONTH = (
+    r'jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|aug(?:ust)?'
+    r'|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?'
+)
+_MERIDIEM = r'a\.m\.|p\.m\.|am|pm'
+
+# One alternation over every date, time and duration form. finditer takes the
+# leftmost match and moves past it, so tokens never overlap: the digits of
+# "12/25" or "for 30 minutes" are not read again as times.
+GRAMMAR = re.compile('|'.join([
+    r'\bfor (?P<duration_value>\d+) ?(?P<duration_unit>minutes?|mins?|hours?|hrs?|days?|weeks?|months?)\b',
+    r'\b(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})\b',
+    # "9-5" and "1-3 pm" are hour ranges: without a year, a dash only separates
+    # a month from a day that can't be an hour ("11-30")
+    r'\b(?P<numeric_month>\d{1,2})(?:/|-(?=\d{1,2}-\d{2,4}\b|(?:1[3-9]|2\d|3[01])\b))'
+    r'(?P<numeric_day>\d{1,2})(?:[/-](?P<numeric_year>\d{2,4}))?\b',
+    rf'\b(?P<month_day>\d{{1,2}})(?:st|nd|rd|th)?[ ,-]*(?P<month_name>{_MONTH})\b(?:[ ,-]*(?P<month_year>\d{{4}}))?',
+    rf'\b(?P<month_first>{_MONTH}) (?P<month_first_day>\d{{1,2}})(?:st|nd|rd|th)?\b(?:,? (?P<month_first_year>\d{{4}}))?',
+    rf'\b(?:(?P<time_prefix>at|from|to|until|till) )?(?P<hour>\d{{1,2}})(?::(?P<minute>\d{{2}}))?'
+    rf'(?:(?: ?(?P<meridiem>{_MERIDIEM})|(?P<meridiem_letter>a|p))(?![a-z]))?(?P<range_start>(?= ?- ?\d))?(?![\d:])',
+    r'(?P<relative_day>today|tomorrow)',
+    rf'next (?P<next_day>{_DAY})',
+    r'next (?P<next_period>week|month)',
+    rf'(?P<day>{_DAY})',
+    r'(?P<named_time>morning|afternoon|evening|noon|midnight)',
+]))
+
+
+def _next_weekday(today, day_name):
+    days_ahead = DAY_NAME_TO_INDEX[day_name] - today.weekday()
+    if days_ahead <= 0:  # Target day is today or earlier this week
+        days_ahead += 7  # Go to next week
+    return today + timedelta(days=days_ahead)
+
+
+def _full_year(year, now):
+    if year is None:
+        return now.year
+    year = int(year)
+    if year < 100:  # Handle two-digit years
+        year = 2000 + year if year < 50 else 1900 + year
+    return year
+
+
+def _date(match, now, today):
+    """The date a grammar match names, or None if it isn't a (valid) date."""
+    if match.group('relative_day'):
+        return today if match.group('relative_day') == 'today' else today + timedelta(days=1)
+    if match.group('next_day'):
+        return _next_weekday(today, match.group('next_day'))
+    if match.group('day'):
+        return _next_weekday(today, match.group('day'))
+    if match.group('next_period') == 'week':
+        # Next Monday
+        return today + timedelta(days=7 - today.weekday())
+    if match.group('next_period') == 'month':
+        if today.month == 12:
+            return today.replace(year=today.year + 1, month=1, day=1)
+        return today.replace(month=today.month + 1, day=1)
+
+    try:
+        if match.group('iso_year'):
+            return datetime(int(match.group('iso_year')), int(match.group('iso_month')), int(match.group('iso_day')))
+        if match.group('numeric_month'):
+            return datetime(
+                _full_year(match.group('numeric_year'), now),
+                int(match.group('numeric_month')),
+                int(match.group('numeric_day'))
+            )
+        if match.group('month_name'):
+            return datetime(
+                _full_year(match.group('month_year'), now),
+                MONTH_PREFIX_TO_NUMBER[match.group('month_name')[:3]],
+                int(match.group('month_day'))
+            )
+        if match.group('month_first'):
+            return datetime(
+                _full_year(match.group('month_first_year'), now),
+                MONTH_PREFIX_TO_NUMBER[match.group('month_first')[:3]],
+                int(match.group('month_first_day'))
+            )
+    except ValueError:
+        pass
+    return None
+
+
+def _time(match, range_end=False):
+    """
+    The time of day a grammar match names.
+
+    Args:
+        match: Grammar match
+        range_end: Whether the match ends a range whose start was a time ("9-5")
+
+    Returns:
+        tuple: (hour, minute, has_meridiem), or None if it isn't a (valid) time
+    """
+    if match.group('named_time'):
+        return NAMED_TIMES[match.group('named_time')] + (True,)
+    if match.group('hour') is None:
+        return None
+
+    meridiem = match.group('meridiem') or match.group('meridiem_letter')
+    # A bare number is only a time after "at", "from", "to", ..., with
+    # minutes, or as either end of a range ("1-3pm", "9-5")
+    if not (meridiem or match.group('minute') or match.group('time_prefix') or range_end
+            or match.group('range_start') is not None):
+        return None
+
+    hour = int(match.group('hour'))
+    minute = int(match.group('minute') or 0)
+    if meridiem and meridiem[0] == 'p' and hour < 12:
+        hour += 12
+    elif meridiem and meridiem[0] == 'a' and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute, bool(meridiem)
+
+
+def _duration(match):
+    unit = match.group('duration_unit')
+    for prefix, minutes in DURATION_UNIT_MINUTES.items():
+        if unit.startswith(prefix):
+            return int(match.group('duration_value')) * minutes
+    return None  # months have no fixed length
+
+
+def extract_dates_times(text, now):
+    """
+    Extract dates, times and a duration from lowercased text in one scan.
+
+    The first date is the due date. The first time is the start and the
+    second the end, both on the due date (or today). A second date without
+    any times becomes the start time. Within a time range a missing am/pm is
+    taken from the other end ("from 9 to 5", "1-3pm").
+
+    Args:
+        text: Lowercased text
+        now: Reference time for relative dates
+
+    Returns:
+        dict: Any of due_date, start_time, end_time (datetimes) and duration (minutes)
+    """
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    dates = []
+    times = []
+    duration = None
+    range_open = False
+
+    for match in GRAMMAR.finditer(text):
+        range_end, range_open = range_open, False
+        if match.group('duration_unit'):
+            if duration is None:
+                duration = _duration(match)
+            continue
+        date = _date(match, now, today)
+        if date is not None:
+            dates.append(date)
+            continue
+        time_of_day = _time(match, range_end)
+        if time_of_day is not None:
+            times.append(time_of_day)
+            range_open = match.group('range_start') is not None
+
+    result = {}
+    if dates:
+        result['due_date'] = dates[0]
+    base = result.get('due_date', today)
+
+    if times:
+        hour, minute, _ = times[0]
+        result['start_time'] = base.replace(hour=hour, minute=minute)
+    elif len(dates) > 1:
+        result['start_time'] = dates[1]
+
+    if len(times) > 1:
+        start_time = result['start_time']
+        start_has_meridiem = times[0][2]
+        hour, minute, has_meridiem = times[1]
+        end_time = base.replace(hour=hour, minute=minute)
+        if not has_meridiem and end_time <= start_time and hour < 12:
+            end_time += timedelta(hours=12)
+        elif has_meridiem and not start_has_meridiem and start_time.hour < 12 \
+                and start_time + timedelta(hours=12) <= end_time:
+            # The range's am/pm applies to both ends ("1-3pm")
+            result['start_time'] = start_time + timedelta(hours=12)
+        result['end_time'] = end_time
+
+    if duration is not None:
+        result['duration'] = duration
+        # If we have a start time and duration but no end time, calculate the end time
+        if 'start_time' in result and 'end_time' not in result:
+            result['end_time'] = result['start_time'] + timedelta(minutes=duration)
+
+    return result
@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, or_, select
+
+from app import app, db
+from models import StreamEvent
+
+logger = logging.getLogger(__name__)
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+
+# Events buffered per connection before new ones are dropped
+MAX_PENDING_EVENTS = 100
+
+# Seconds of relayed events read again on every poll. Ids are allocated before
+# commit, so a row may appear after rows with higher ids; it is still relayed
+# if it commits within this window (less the clock skew between hosts).
+RELAY_LOOKBACK = 30
+
+
+class EventBroker:
+    """
+    Publish/subscribe hub for Server-Sent Events.
+
+    Each open event stream owns a small queue; publishers never block and
+    idle streams only wake up for heartbeats. Under the gevent worker
+    (see gunicorn.conf.py) every stream is a greenlet rather than a thread,
+    so a worker can hold thousands of idle connections.
+
+    A user's streams may be held by any worker, so events are relayed through
+    the StreamEvent table: publish() delivers to this process's streams at
+    once and queues the event, and a background thread writes queued events
+    and every poll_interval seconds delivers those published by other
+    processes. Publishers never wait for the database.
+    """
+
+    def __init__(self, heartbeat_interval=HEARTBEAT_INTERVAL, max_pending=MAX_PENDING_EVENTS, poll_interval=None):
+        self.heartbeat_interval = heartbeat_interval
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval or app.config.get('EVENT_POLL_INTERVAL', 1)
+        self._subscribers = {}  # user_id -> set of queues
+        self._lock = threading.Lock()
+        self._outbox = deque(maxlen=10000)
+        self._last_id = None
+        self._seen = {}  # id -> created_at of events read within RELAY_LOOKBACK
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._origin = None
+        logger.debug("Event broker initialized")
+
+    def subscribe(self, user_id):
+        """
+        Register a new stream for a user.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            queue.Queue: The subscription queue to pass to stream()
+        """
+        subscription = queue.Queue(maxsize=self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        self._ensure_running()
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        """
+        Remove a stream registered with subscribe().
+
+        Args:
+            user_id: ID of the user
+            subscription: The queue returned by subscribe()
+        """
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event, data):
+        """
+        Push an event to every open stream of a user, in every process.
+
+        Args:
+            user_id: ID of the user
+            event: Event name (e.g. 'reminder', 'task')
+            data: JSON-serializable payload
+
+        Returns:
+            int: Number of streams in this process the event was queued on
+        """
+        payload = json.dumps(data, default=str)
+        self._ensure_running()
+        with self._lock:
+            self._outbox.append({
+                'user_id': user_id, 'event': event, 'data': payload, 'origin': self._origin
+            })
+        self._wake.set()
+        return self._deliver(user_id, event, payload)
+
+    def _deliver(self, user_id, event, payload):
+        # Queue an event on this process's streams of the user
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+
+        if not subscriptions:
+            return 0
+
+        message = f"event: {event}\ndata: {payload}\n\n"
+        delivered = 0
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(message)
+                delivered += 1
+            except queue.Full:
+                # Slow consumer, drop the event rather than block the publisher
+                logger.warning(f"Dropping '{event}' event for user {user_id}: stream backlog full")
+        return delivered
+
+    def stream(self, user_id, subscription):
+        """
+        Generate the text/event-stream body for a subscription.
+
+        Args:
+            user_id: ID of the user
+            subscription: The queue returned by subscribe()
+
+        Yields:
+            str: SSE-formatted messages and keep-alive comments
+        """
+        try:
+            # Ask the browser to wait a little before reconnecting
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    yield subscription.get(timeout=self.heartbeat_interval)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(user_id, subscription)
+
+    def connection_count(self):
+        """Return the number of open streams in this process."""
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def start(self):
+        """Start the relay thread if it isn't running in this process."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            # A forked worker inherits the broker but not the thread, and
+            # must not take the parent's events for its own
+            self._pid = os.getpid()
+            self._origin = f"{socket.gethostname()}:{self._pid}"
+            self._last_id = None
+            self._seen = {}
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='event-relay', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the relay thread and write the events still queued."""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        with app.app_context():
+            self.relay()
+
+    def prune(self):
+        """
+        Delete relayed events older than EVENT_RETENTION seconds. Needs an application context.
+
+        Returns:
+            int: Number of events deleted
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=app.config.get('EVENT_RETENTION', 300))
+        table = StreamEvent.__table__
+        with db.engine.begin() as conn:
+            return conn.execute(delete(table).where(table.c.created_at < cutoff)).rowcount
+
+    def relay(self):
+        """
+        Write queued events, then deliver the ones other processes published
+        since the last call. Needs an application context.
+
+        Events are stamped when written, and the last RELAY_LOOKBACK seconds
+        are read again every time, so an event that commits after one with a
+        higher id isn't skipped; ids already read are not delivered twice.
+
+        Returns:
+            int: Number of events from other processes delivered
+        """
+        table = StreamEvent.__table__
+        with self._lock:
+            batch = list(self._outbox)
+            self._outbox.clear()
+
+        cutoff = datetime.utcnow() - timedelta(seconds=RELAY_LOOKBACK)
+        try:
+            with db.engine.begin() as conn:
+                if self._last_id is None:
+                    # Only events published from now on are relayed
+                    self._last_id = conn.execute(select(func.max(table.c.id))).scalar() or 0
+                    self._seen = dict(conn.execute(
+                        select(table.c.id, table.c.created_at).where(table.c.created_at >= cutoff)
+                    ).all())
+                if batch:
+                    conn.execute(insert(table), batch)
+        except Exception:
+            # Keep the events for the next attempt, as far as the outbox bound allows
+            with self._lock:
+                self._outbox.extendleft(reversed(batch))
+            raise
+
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.user_id, table.c.event, table.c.data, table.c.origin, table.c.created_at)
+                .where(or_(table.c.id > self._last_id, table.c.created_at >= cutoff))
+                .order_by(table.c.id)
+            ).all()
+
+        self._seen = {event_id: created_at for event_id, created_at in self._seen.items() if created_at >= cutoff}
+        delivered = 0
+        for row in rows:
+            if row.id in self._seen:
+                continue
+            self._seen[row.id] = row.created_at
+            self._last_id = max(self._last_id, row.id)
+            if row.origin != self._origin:
+                self._deliver(row.user_id, row.event, row.data)
+                delivered += 1
+        return delivered
+
+    def _ensure_running(self):
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with app.app_context():
+                try:
+                    self.relay()
+                except Exception as e:
+                    logger.error(f"Error relaying events: {str(e)}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+event_broker = EventBroker()
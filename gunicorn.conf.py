@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+import time
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+
+# Live notifications (/api/events) keep connections open indefinitely, each
+# holding a gthread thread. GUNICORN_WORKER_CLASS=gevent serves them from
+# greenlets instead, so a worker can hold thousands of idle streams; but
+# spaCy and scikit-learn calls then block every greenlet of the worker, so
+# pair it with NLP_SERVER_SOCKET (socket I/O yields to other greenlets).
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gevent":
+    worker_connections = int(os.environ.get("WORKER_CONNECTIONS", 2000))
+    os.environ.setdefault("LIVE_EVENTS_ENABLED", "1")
+else:
+    threads = int(os.environ.get("GUNICORN_THREADS", 8))
+    # A handful of open tabs would take every thread and stall the site, so
+    # pages don't subscribe to the stream (workers inherit this environment)
+    os.environ["LIVE_EVENTS_ENABLED"] = "0"
+
+# Streams are kept alive by heartbeats, so only time out truly stuck workers
+timeout = 120
+
+
+# With NLP_SERVER_SOCKET set, one shared process holds the spaCy model and
+# workers send it their texts (see nlp_server.py)
+nlp_server_socket = os.environ.get("NLP_SERVER_SOCKET")
+nlp_server_process = None
+
+
+def on_starting(server):
+    global nlp_server_process
+    if not nlp_server_socket:
+        return
+    if os.path.exists(nlp_server_socket):
+        os.unlink(nlp_server_socket)
+    nlp_server_process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "nlp_server.py"), nlp_server_socket]
+    )
+    # Wait for the model to load so the first requests don't fail
+    deadline = time.monotonic() + 60
+    while not os.path.exists(nlp_server_socket) and time.monotonic() < deadline:
+        if nlp_server_process.poll() is not None:
+            raise RuntimeError("NLP server exited during startup")
+        time.sleep(0.1)
+
+
+def on_exit(server):
+    if nlp_server_process is not None:
+        nlp_server_process.terminate()
+        nlp_server_process.wait(timeout=10)
+
+
+def post_worker_init(worker):
+    if worker_class == "gevent":
+        # The worker has monkey-patched select by now: have psycopg2 wait on
+        # the socket through it, so queries yield instead of blocking the worker
+        try:
+            import psycopg2.extensions
+            import psycopg2.extras
+            psycopg2.extensions.set_wait_callback(psycopg2.extras.wait_select)
+        except ImportError:
+            pass
+
+    # Every worker runs the job scheduler; the database lease elects one leader
+    from routes import job_scheduler
+    job_scheduler.start()
+
+
+def worker_exit(server, worker):
+    from routes import job_scheduler, activity_writer, event_broker
+    job_scheduler.stop()
+    activity_writer.stop()
+    event_broker.stop()
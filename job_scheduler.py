@@ -0,0 +1,200 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app import app, db
+from models import SchedulerLease, ScheduledJobState
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'periodic-jobs'
+
+
+class JobScheduler:
+    """
+    Runs periodic jobs in a background thread of every worker, while a lease
+    row in the database makes sure only one worker across the cluster (the
+    current lease holder) actually executes them.
+    """
+
+    def __init__(self, lease_name=LEASE_NAME):
+        self.lease_name = lease_name
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs = {}
+        self.is_leader = False
+        self._thread = None
+        self._stop_event = threading.Event()
+        logger.debug("Job scheduler initialized")
+
+    def add_job(self, name, interval, func):
+        """
+        Register a periodic job.
+
+        Args:
+            name: Unique job name
+            interval: Seconds between runs
+            func: Callable run inside an application context
+        """
+        self.jobs[name] = {'interval': interval, 'func': func}
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the scheduler thread if enabled and not already running."""
+        if not app.config.get('SCHEDULER_ENABLED', True) or self.is_running():
+            return
+
+        # The holder id must be unique per process, including forked workers
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='job-scheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"Job scheduler started as {self.holder_id}")
+
+    def stop(self):
+        """Stop the scheduler thread and give up the lease."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self.is_leader:
+            with app.app_context():
+                self._release_lease()
+
+    def _run(self):
+        tick_interval = app.config.get('SCHEDULER_TICK_INTERVAL', 15)
+        while not self._stop_event.is_set():
+            with app.app_context():
+                try:
+                    self.is_leader = self._acquire_lease()
+                    if self.is_leader:
+                        self._run_due_jobs()
+                except Exception as e:
+                    logger.error(f"Error in job scheduler: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            self._stop_event.wait(tick_interval)
+
+    def _acquire_lease(self):
+        """
+        Take or renew the lease.
+
+        Returns:
+            bool: True if this process holds the lease
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=app.config.get('SCHEDULER_LEASE_TTL', 90))
+
+        # Renew our own lease or take over an expired one in a single statement
+        result = db.session.execute(
+            update(SchedulerLease).where(
+                SchedulerLease.name == self.lease_name,
+                or_(
+                    SchedulerLease.holder == self.holder_id,
+                    SchedulerLease.expires_at < now
+                )
+            ).values(holder=self.holder_id, expires_at=expires_at)
+        )
+        if result.rowcount == 1:
+            db.session.commit()
+            if not self.is_leader:
+                logger.info(f"{self.holder_id} acquired the scheduler lease")
+            return True
+
+        db.session.rollback()
+        if db.session.get(SchedulerLease, self.lease_name) is not None:
+            return False
+
+        # First run against this database, create the lease row
+        try:
+            db.session.add(SchedulerLease(name=self.lease_name, holder=self.holder_id, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    def _release_lease(self):
+        db.session.execute(
+            update(SchedulerLease).where(
+                SchedulerLease.name == self.lease_name,
+                SchedulerLease.holder == self.holder_id
+            ).values(expires_at=datetime.utcnow())
+        )
+        db.session.commit()
+        self.is_leader = False
+
+    def _run_due_jobs(self):
+        for name, job in self.jobs.items():
+            if self._stop_event.is_set():
+                break
+
+            state = db.session.get(ScheduledJobState, name)
+            if state is None:
+                state = ScheduledJobState(name=name, run_count=0, failure_count=0, total_duration_ms=0.0)
+                db.session.add(state)
+
+            now = datetime.utcnow()
+            if state.last_started_at and now - state.last_started_at < timedelta(seconds=job['interval']):
+                continue
+
+            state.last_started_at = now
+            state.last_holder = self.holder_id
+            db.session.commit()
+
+            started = time.perf_counter()
+            error = None
+            try:
+                job['func']()
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Job {name} failed: {error}")
+                db.session.rollback()
+            duration_ms = (time.perf_counter() - started) * 1000
+
+            # Reload the state, the job may have expired or rolled back the session
+            state = db.session.get(ScheduledJobState, name)
+            state.last_finished_at = datetime.utcnow()
+            state.last_duration_ms = duration_ms
+            state.total_duration_ms = (state.total_duration_ms or 0.0) + duration_ms
+            state.run_count = (state.run_count or 0) + 1
+            if error:
+                state.failure_count = (state.failure_count or 0) + 1
+                state.last_error = error
+            db.session.commit()
+            logger.debug(f"Job {name} finished in {duration_ms:.1f} ms")
+
+            # Keep the lease alive between long-running jobs
+            if not self._acquire_lease():
+                self.is_leader = False
+                break
+
+    def get_status(self):
+        """
+        Get job timing metrics and leadership information.
+
+        Returns:
+            dict: Scheduler status
+        """
+        lease = db.session.get(SchedulerLease, self.lease_name)
+        states = {state.name: state for state in ScheduledJobState.query.all()}
+        return {
+            'holder_id': self.holder_id,
+            'running': self.is_running(),
+            'is_leader': self.is_leader,
+            'leader': lease.holder if lease else None,
+            'lease_expires_at': lease.expires_at.isoformat() if lease and lease.expires_at else None,
+            'jobs': [
+                dict(states[name].to_dict() if name in states else {'name': name, 'run_count': 0},
+                     interval_seconds=job['interval'])
+                for name, job in self.jobs.items()
+            ]
+        }
@@ -0,0 +1,81 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton for finding many phrases in one pass over a text.
+
+    Phrases are added with a tag (any hashable value); a phrase can carry
+    several tags. After build(), find_all reports every occurrence of every
+    phrase, overlapping ones included, in a single scan whose cost depends
+    on the length of the text and not on the number of phrases.
+
+    The automaton is compiled into a full transition table, so matching is
+    one dict lookup per character.
+    """
+
+    def __init__(self):
+        self._phrases = {}  # phrase -> tags
+        self._transitions = None
+        self._outputs = None
+
+    def add(self, phrase, tag):
+        """Add a phrase (matched as an exact substring) with a tag."""
+        if not phrase:
+            raise ValueError("Cannot match an empty phrase")
+        self._phrases.setdefault(phrase, []).append(tag)
+        self._transitions = None
+
+    def build(self):
+        # Trie of all phrases
+        goto = [{}]
+        outputs = [[]]
+        for phrase, tags in self._phrases.items():
+            state = 0
+            for char in phrase:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append((phrase, tuple(tags)))
+
+        # Failure links, breadth first, folded into a full transition table
+        transitions = [dict(goto[0])] + [None] * (len(goto) - 1)
+        failure = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            fallback = transitions[failure[state]]
+            outputs[state] = outputs[state] + outputs[failure[state]]
+            transitions[state] = dict(fallback)
+            for char, child in goto[state].items():
+                failure[child] = fallback.get(char, 0)
+                transitions[state][char] = child
+                queue.append(child)
+
+        self._transitions = transitions
+        self._outputs = outputs
+        return self
+
+    def find_all(self, text):
+        """
+        Find every phrase occurrence in the text.
+
+        Returns:
+            list: (start, end, phrase, tags) tuples, ordered by end position
+        """
+        if self._transitions is None:
+            self.build()
+        transitions = self._transitions
+        outputs = self._outputs
+
+        hits = []
+        state = 0
+        for index, char in enumerate(text):
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                end = index + 1
+                for phrase, tags in outputs[state]:
+                    hits.append((end - len(phrase), end, phrase, tags))
+        return hits
@@ -1,8 +1,18 @@
 from app import app
+from flask_migrate import upgrade
 import routes  # noqa: F401
+import api  # noqa: F401
+import task_import  # noqa: F401
+import query_plans  # noqa: F401
 import logging
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
+    
+    # Bring the development database up to date before serving
+    with app.app_context():
+        upgrade()
+    
+    routes.job_scheduler.start()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,38 @@
+"""stream events
+
+Revision ID: 287e3e351817
+Revises: 480fbb72d1d1
+Create Date: 2026-10-19 10:41:07.218345
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '287e3e351817'
+down_revision = '480fbb72d1d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stream_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event', sa.String(length=50), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('origin', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('stream_event', schema=None) as batch_op:
+        batch_op.create_index('ix_stream_event_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stream_event', schema=None) as batch_op:
+        batch_op.drop_index('ix_stream_event_created_at')
+
+    op.drop_table('stream_event')
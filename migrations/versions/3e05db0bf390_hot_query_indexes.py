@@ -0,0 +1,56 @@
+"""hot query indexes
+
+Revision ID: 3e05db0bf390
+Revises: b3e64b3af2a4
+Create Date: 2026-10-19 08:24:57.154608
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e05db0bf390'
+down_revision = 'b3e64b3af2a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_user_status_due', ['user_id', 'status', 'due_date'], unique=False)
+        batch_op.create_index('ix_task_user_due', ['user_id', 'due_date'], unique=False)
+        batch_op.create_index('ix_task_user_created', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index(
+            'ix_task_user_pending_priority', ['user_id', 'priority'], unique=False,
+            sqlite_where=sa.text("status = 'pending'"),
+            postgresql_where=sa.text("status = 'pending'")
+        )
+
+    with op.batch_alter_table('reminder', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_reminder_unsent_remind_at', ['remind_at'], unique=False,
+            sqlite_where=sa.text('sent = 0'),
+            postgresql_where=sa.text('sent = false')
+        )
+        batch_op.create_index('ix_reminder_task_id', ['task_id'], unique=False)
+
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.create_index('ix_user_activity_user_type_details', ['user_id', 'activity_type', 'details'], unique=False)
+        batch_op.create_index('ix_user_activity_user_timestamp', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_activity_user_timestamp')
+        batch_op.drop_index('ix_user_activity_user_type_details')
+
+    with op.batch_alter_table('reminder', schema=None) as batch_op:
+        batch_op.drop_index('ix_reminder_task_id')
+        batch_op.drop_index('ix_reminder_unsent_remind_at')
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_user_pending_priority')
+        batch_op.drop_index('ix_task_user_created')
+        batch_op.drop_index('ix_task_user_due')
+        batch_op.drop_index('ix_task_user_status_due')
@@ -0,0 +1,68 @@
+"""task title trigram index
+
+Revision ID: 480fbb72d1d1
+Revises: 995aad49298a
+Create Date: 2026-10-19 09:12:41.503218
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '480fbb72d1d1'
+down_revision = '995aad49298a'
+branch_labels = None
+depends_on = None
+
+# Copy of models.title_trigrams as of this revision
+_TITLE_WORD = re.compile(r'[^\W_]+')
+
+
+def _title_trigrams(title):
+    trigrams = set()
+    for word in _TITLE_WORD.findall(title.lower()):
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def upgrade():
+    trigram_table = op.create_table('task_title_trigram',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('trigram', sa.String(length=3), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'trigram', 'task_id')
+    )
+    with op.batch_alter_table('task_title_trigram', schema=None) as batch_op:
+        batch_op.create_index('ix_task_title_trigram_task_id', ['task_id'], unique=False)
+
+    # Index the existing titles in chunks of tasks
+    task = sa.table('task', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('title', sa.String))
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(task.c.id, task.c.user_id, task.c.title)
+            .where(task.c.id > last_id).order_by(task.c.id).limit(1000)
+        ).all()
+        if not rows:
+            break
+        trigrams = [
+            {'user_id': user_id, 'trigram': trigram, 'task_id': task_id}
+            for task_id, user_id, title in rows
+            for trigram in _title_trigrams(title or '')
+        ]
+        if trigrams:
+            op.bulk_insert(trigram_table, trigrams)
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('task_title_trigram', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_title_trigram_task_id')
+
+    op.drop_table('task_title_trigram')
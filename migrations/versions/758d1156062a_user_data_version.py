@@ -0,0 +1,26 @@
+"""user data version
+
+Revision ID: 758d1156062a
+Revises: 3e05db0bf390
+Create Date: 2026-10-19 08:27:14.591952
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '758d1156062a'
+down_revision = '3e05db0bf390'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
@@ -0,0 +1,31 @@
+"""task priority not null
+
+Revision ID: 75c43bc42e79
+Revises: 287e3e351817
+Create Date: 2026-10-19 10:58:32.640117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '75c43bc42e79'
+down_revision = '287e3e351817'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination compares and sorts on priority; NULLs would fall
+    # outside every comparison and sort differently per database
+    task = sa.table('task', sa.column('priority', sa.Integer))
+    op.execute(task.update().where(task.c.priority.is_(None)).values(priority=0))
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.alter_column('priority', existing_type=sa.Integer(), nullable=False, server_default='0')
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.alter_column('priority', existing_type=sa.Integer(), nullable=True, server_default=None)
@@ -0,0 +1,34 @@
+"""task score versions
+
+Revision ID: 854c9a963b48
+Revises: 75c43bc42e79
+Create Date: 2026-10-19 09:36:42.827844
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '854c9a963b48'
+down_revision = '75c43bc42e79'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing tasks start at score version 0: sync clients got their current
+    # scores with the tasks themselves
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('score_version', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('score_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('score_version')
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_column('score_version')
@@ -0,0 +1,59 @@
+"""productivity rollups
+
+Revision ID: 995aad49298a
+Revises: c823c2cac738
+Create Date: 2026-10-19 08:38:10.826932
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '995aad49298a'
+down_revision = 'c823c2cac738'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('productivity_rollup',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('total_tasks', sa.Integer(), nullable=False),
+    sa.Column('completed_tasks', sa.Integer(), nullable=False),
+    sa.Column('completion_hours_sum', sa.Float(), nullable=False),
+    sa.Column('completion_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'category')
+    )
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('completed_at', sa.DateTime(), nullable=True))
+
+    # Completed tasks take their completion time from the task_completed activity;
+    # run `flask rebuild-productivity-rollups` afterwards to fill the rollup table
+    task = sa.table(
+        'task',
+        sa.column('id', sa.Integer), sa.column('user_id', sa.Integer),
+        sa.column('status', sa.String), sa.column('completed_at', sa.DateTime)
+    )
+    activity = sa.table(
+        'user_activity',
+        sa.column('user_id', sa.Integer), sa.column('activity_type', sa.String),
+        sa.column('details', sa.Text), sa.column('timestamp', sa.DateTime)
+    )
+    op.execute(task.update().where(task.c.status == 'completed').values(
+        completed_at=sa.select(sa.func.min(activity.c.timestamp)).where(
+            activity.c.user_id == task.c.user_id,
+            activity.c.activity_type == 'task_completed',
+            activity.c.details == sa.cast(task.c.id, sa.String)
+        ).scalar_subquery()
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_column('completed_at')
+
+    op.drop_table('productivity_rollup')
@@ -0,0 +1,49 @@
+"""reminder digest and scheduler tables
+
+Revision ID: b3e64b3af2a4
+Revises: b45c1768d4ba
+Create Date: 2026-10-19 08:24:52.902879
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e64b3af2a4'
+down_revision = 'b45c1768d4ba'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_preference', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reminder_delivery', sa.String(length=20), nullable=True))
+
+    op.create_table('scheduler_lease',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('holder', sa.String(length=100), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+    op.create_table('scheduled_job_state',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('last_started_at', sa.DateTime(), nullable=True),
+        sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+        sa.Column('last_duration_ms', sa.Float(), nullable=True),
+        sa.Column('total_duration_ms', sa.Float(), nullable=True),
+        sa.Column('run_count', sa.Integer(), nullable=True),
+        sa.Column('failure_count', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('last_holder', sa.String(length=100), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('scheduled_job_state')
+    op.drop_table('scheduler_lease')
+
+    with op.batch_alter_table('user_preference', schema=None) as batch_op:
+        batch_op.drop_column('reminder_delivery')
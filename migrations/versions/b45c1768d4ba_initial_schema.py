@@ -0,0 +1,104 @@
+"""initial schema
+
+Baseline of the schema previously created by db.create_all(). Tables that
+already exist are left untouched so existing databases can simply be
+upgraded instead of stamped.
+
+Revision ID: b45c1768d4ba
+Revises: 
+Create Date: 2026-10-19 08:24:49.458690
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b45c1768d4ba'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('user'):
+        op.create_table('user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=64), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=256), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('username')
+        )
+
+    if not _has_table('task'):
+        op.create_table('task',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=120), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('due_date', sa.DateTime(), nullable=True),
+            sa.Column('start_time', sa.DateTime(), nullable=True),
+            sa.Column('end_time', sa.DateTime(), nullable=True),
+            sa.Column('priority', sa.Integer(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('category', sa.String(length=50), nullable=True),
+            sa.Column('ml_priority_score', sa.Float(), nullable=True),
+            sa.Column('calendar_event_id', sa.String(length=100), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('user_preference'):
+        op.create_table('user_preference',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('working_hours_start', sa.Time(), nullable=True),
+            sa.Column('working_hours_end', sa.Time(), nullable=True),
+            sa.Column('break_duration', sa.Integer(), nullable=True),
+            sa.Column('productivity_peak_hours', sa.String(length=100), nullable=True),
+            sa.Column('preferred_task_duration', sa.Integer(), nullable=True),
+            sa.Column('calendar_connected', sa.Boolean(), nullable=True),
+            sa.Column('calendar_credentials', sa.Text(), nullable=True),
+            sa.Column('notification_preferences', sa.String(length=100), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id')
+        )
+
+    if not _has_table('reminder'):
+        op.create_table('reminder',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('task_id', sa.Integer(), nullable=False),
+            sa.Column('remind_at', sa.DateTime(), nullable=False),
+            sa.Column('sent', sa.Boolean(), nullable=True),
+            sa.Column('type', sa.String(length=20), nullable=True),
+            sa.ForeignKeyConstraint(['task_id'], ['task.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('user_activity'):
+        op.create_table('user_activity',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+            sa.Column('activity_type', sa.String(length=50), nullable=True),
+            sa.Column('details', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('user_activity')
+    op.drop_table('reminder')
+    op.drop_table('user_preference')
+    op.drop_table('task')
+    op.drop_table('user')
@@ -0,0 +1,53 @@
+"""task sync versions and tombstones
+
+Revision ID: c823c2cac738
+Revises: e9165afb5fdb
+Create Date: 2026-10-19 08:33:50.211544
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c823c2cac738'
+down_revision = 'e9165afb5fdb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('task_tombstone',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('task_tombstone', schema=None) as batch_op:
+        batch_op.create_index('ix_task_tombstone_user_version', ['user_id', 'version', 'task_id'], unique=False)
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_task_user_updated', ['user_id', 'updated_at'], unique=False)
+        batch_op.create_index('ix_task_user_version', ['user_id', 'version', 'id'], unique=False)
+
+    # Existing tasks keep version 0, which a full sync includes
+    task = sa.table('task', sa.column('created_at', sa.DateTime), sa.column('updated_at', sa.DateTime))
+    op.execute(task.update().values(updated_at=task.c.created_at))
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_user_version')
+        batch_op.drop_index('ix_task_user_updated')
+        batch_op.drop_column('version')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('task_tombstone', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_tombstone_user_version')
+
+    op.drop_table('task_tombstone')
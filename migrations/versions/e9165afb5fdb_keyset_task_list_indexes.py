@@ -0,0 +1,41 @@
+"""keyset task list indexes
+
+Revision ID: e9165afb5fdb
+Revises: 758d1156062a
+Create Date: 2026-10-19 08:28:56.943459
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9165afb5fdb'
+down_revision = '758d1156062a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Extend the list indexes with (priority DESC, id) so keyset pages need no sort
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_user_status_due')
+        batch_op.drop_index('ix_task_user_due')
+        batch_op.create_index(
+            'ix_task_user_status_due',
+            ['user_id', 'status', 'due_date', sa.text('priority DESC'), 'id'],
+            unique=False
+        )
+        batch_op.create_index(
+            'ix_task_user_due',
+            ['user_id', 'due_date', sa.text('priority DESC'), 'id'],
+            unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_user_due')
+        batch_op.drop_index('ix_task_user_status_due')
+        batch_op.create_index('ix_task_user_due', ['user_id', 'due_date'], unique=False)
+        batch_op.create_index('ix_task_user_status_due', ['user_id', 'status', 'due_date'], unique=False)
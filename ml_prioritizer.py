@@ -7,10 +7,13 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 
 from app import db
-from models import Task, UserActivity
+from models import Task
 
 logger = logging.getLogger(__name__)
 
+# Score changes smaller than this aren't written back by the rescoring job
+SCORE_TOLERANCE = 1e-3
+
 class MLPrioritizer:
     def __init__(self):
         self.model = None
@@ -114,13 +117,7 @@ class MLPrioritizer:
         
         for task in completed_tasks:
             # Use task completion time as reference
-            user_activity = UserActivity.query.filter_by(
-                user_id=user_id,
-                activity_type='task_completed',
-                details=str(task.id)
-            ).first()
-            
-            completion_time = user_activity.timestamp if user_activity else task.created_at
+            completion_time = task.completed_at or task.created_at
             
             # Extract features
             features = self.extract_features(task, all_tasks, completion_time)
@@ -193,6 +190,44 @@ class MLPrioritizer:
         # Fallback: rule-based prioritization
         return self._rule_based_priority(task)
     
+    def prioritize_tasks(self, tasks, user_tasks):
+        """
+        Calculate priority scores for many tasks with a single model call.
+        
+        Args:
+            tasks: List of Task objects to score
+            user_tasks: List of all user tasks
+            
+        Returns:
+            list: Priority scores between 0-1, in the order of tasks
+        """
+        if not tasks:
+            return []
+        
+        if self.model:
+            try:
+                # Count completed tasks per category once instead of once per task
+                completed_by_category = {}
+                for t in user_tasks:
+                    if t.category and t.status == 'completed':
+                        completed_by_category[t.category] = completed_by_category.get(t.category, 0) + 1
+                
+                now = datetime.now()
+                rows = []
+                for task in tasks:
+                    features = self.extract_features(task, None, now).flatten()
+                    similar_completed = completed_by_category.get(task.category, 0) if task.category else 0
+                    features[5] = min(similar_completed / 10.0, 1.0)
+                    rows.append(features)
+                
+                predictions = self.model.predict(self.scaler.transform(np.array(rows)))
+                return [max(0, min(p, 1)) for p in predictions]
+            except Exception as e:
+                logger.error(f"Error predicting priorities: {str(e)}")
+        
+        # Fallback: rule-based prioritization
+        return [self._rule_based_priority(task) for task in tasks]
+    
     def _rule_based_priority(self, task):
         """
         Rule-based prioritization when ML model isn't available.
@@ -359,11 +394,13 @@ class MLPrioritizer:
         # Get all user tasks for context
         all_tasks = Task.query.filter_by(user_id=user_id).all()
         
-        # Update priority score for each task
+        # Update priority score for each task, leaving unchanged scores unwritten
         count = 0
         for task in tasks:
-            task.ml_priority_score = self.prioritize_task(task, all_tasks)
-            count += 1
+            score = self.prioritize_task(task, all_tasks)
+            if task.ml_priority_score is None or abs(score - task.ml_priority_score) > SCORE_TOLERANCE:
+                task.ml_priority_score = score
+                count += 1
         
         # Save changes
         db.session.commit()
@@ -1,8 +1,12 @@
 from datetime import datetime
 from app import db, login_manager
 from flask_login import UserMixin
+from sqlalchemy import delete, event, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
+import re
 
 
 @login_manager.user_loader
@@ -16,6 +20,10 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped whenever tasks, preferences or activity of this user change
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped whenever the server rescores this user's tasks (see SERVER_COMPUTED_TASK_FIELDS)
+    score_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
 
     # Relationships
@@ -37,15 +45,37 @@ class Task(db.Model):
     due_date = db.Column(db.DateTime)
     start_time = db.Column(db.DateTime)
     end_time = db.Column(db.DateTime)
-    priority = db.Column(db.Integer, default=0)  # 0-5, 5 being highest
+    priority = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 0-5, 5 being highest
     status = db.Column(db.String(20), default='pending')  # pending, completed, cancelled
     category = db.Column(db.String(50))
     ml_priority_score = db.Column(db.Float, default=0.0)  # ML-calculated priority
     calendar_event_id = db.Column(db.String(100))  # For Google Calendar sync
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)  # Set when status becomes 'completed'
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # User.data_version of the last write
+    score_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # User.score_version of the last rescore
     
     # Relationships
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
+    __table_args__ = (
+        # Dashboard, scheduler and task list lookups; the trailing columns match
+        # the list order (due_date, -priority, id) so keyset pages walk the index
+        db.Index('ix_task_user_status_due', user_id, status, due_date, priority.desc(), id),
+        db.Index('ix_task_user_due', user_id, due_date, priority.desc(), id),
+        # Analytics by creation date
+        db.Index('ix_task_user_created', user_id, created_at),
+        # High-priority pending tasks on the dashboard
+        db.Index(
+            'ix_task_user_pending_priority', user_id, priority,
+            sqlite_where=db.text("status = 'pending'"),
+            postgresql_where=db.text("status = 'pending'")
+        ),
+        # Delta sync, in change order
+        db.Index('ix_task_user_version', user_id, version, id),
+        db.Index('ix_task_user_updated', user_id, updated_at),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -59,7 +89,23 @@ class Task(db.Model):
             'status': self.status,
             'category': self.category,
             'ml_priority_score': self.ml_priority_score,
-            'calendar_event_id': self.calendar_event_id
+            'calendar_event_id': self.calendar_event_id,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'version': self.version
+        }
+    
+    def to_summary_dict(self):
+        """Serialize only the columns loaded for list views (see task_pagination)."""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'priority': self.priority,
+            'status': self.status,
+            'category': self.category
         }
 
 class UserPreference(db.Model):
@@ -73,6 +119,7 @@ class UserPreference(db.Model):
     calendar_connected = db.Column(db.Boolean, default=False)
     calendar_credentials = db.Column(db.Text)  # Stored securely
     notification_preferences = db.Column(db.String(100), default=json.dumps(['email', 'web']))
+    reminder_delivery = db.Column(db.String(20), default='single')  # single, digest
     
     def get_productivity_peak_hours(self):
         try:
@@ -91,9 +138,22 @@ class UserPreference(db.Model):
     
     def set_notification_preferences(self, preferences_list):
         self.notification_preferences = json.dumps(preferences_list)
+    
+    def wants_reminder_digest(self):
+        return self.reminder_delivery == 'digest'
 
 
 class Reminder(db.Model):
+    __table_args__ = (
+        # check_reminders only ever looks at unsent reminders
+        db.Index(
+            'ix_reminder_unsent_remind_at', 'remind_at',
+            sqlite_where=db.text('sent = 0'),
+            postgresql_where=db.text('sent = false')
+        ),
+        db.Index('ix_reminder_task_id', 'task_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
     remind_at = db.Column(db.DateTime, nullable=False)
@@ -101,10 +161,15 @@ class Reminder(db.Model):
     type = db.Column(db.String(20), default='email')  # email, notification
     
     # Relationship
-    task = db.relationship('Task', backref='reminders')
+    task = db.relationship('Task', backref=db.backref('reminders', cascade='all, delete-orphan'))
 
 
 class UserActivity(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_activity_user_type_details', 'user_id', 'activity_type', 'details'),
+        db.Index('ix_user_activity_user_timestamp', 'user_id', 'timestamp'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -113,3 +178,347 @@ class UserActivity(db.Model):
     
     # Relationship
     user = db.relationship('User', backref='activities')
+
+
+class TaskTombstone(db.Model):
+    """Record of a deleted task, kept so sync clients learn about the deletion."""
+    __table_args__ = (
+        db.Index('ix_task_tombstone_user_version', 'user_id', 'version', 'task_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)  # User.data_version of the delete
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class TaskTitleTrigram(db.Model):
+    """One trigram of a task title, for fuzzy title lookup (see task_title_index)."""
+    __table_args__ = (
+        # Reindexing and deleting a task
+        db.Index('ix_task_title_trigram_task_id', 'task_id'),
+    )
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    trigram = db.Column(db.String(3), primary_key=True)
+    task_id = db.Column(db.Integer, primary_key=True)  # no foreign key: rows are removed after the task
+
+
+class StreamEvent(db.Model):
+    """A published live event, relayed to the event streams held by other processes."""
+    __table_args__ = (
+        db.Index('ix_stream_event_created_at', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    event = db.Column(db.String(50), nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON payload
+    origin = db.Column(db.String(100), nullable=False)  # Publishing process, which delivered it itself
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ProductivityRollup(db.Model):
+    """Per-user, per-day (of task creation), per-category task totals for analytics."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True, default='')  # '' for uncategorized
+    total_tasks = db.Column(db.Integer, nullable=False, default=0)
+    completed_tasks = db.Column(db.Integer, nullable=False, default=0)
+    completion_hours_sum = db.Column(db.Float, nullable=False, default=0.0)  # created -> completed
+    completion_count = db.Column(db.Integer, nullable=False, default=0)  # completed tasks with a completed_at
+
+
+class SchedulerLease(db.Model):
+    """Lease row used to elect the single worker that runs periodic jobs."""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100))
+    expires_at = db.Column(db.DateTime)
+
+
+class ScheduledJobState(db.Model):
+    """Last run and timing information for a periodic job, shared across workers."""
+    name = db.Column(db.String(50), primary_key=True)
+    last_started_at = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+    last_duration_ms = db.Column(db.Float)
+    total_duration_ms = db.Column(db.Float, default=0.0)
+    run_count = db.Column(db.Integer, default=0)
+    failure_count = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    last_holder = db.Column(db.String(100))
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'last_started_at': self.last_started_at.isoformat() if self.last_started_at else None,
+            'last_finished_at': self.last_finished_at.isoformat() if self.last_finished_at else None,
+            'last_duration_ms': self.last_duration_ms,
+            'avg_duration_ms': (self.total_duration_ms / self.run_count) if self.run_count else None,
+            'run_count': self.run_count,
+            'failure_count': self.failure_count,
+            'last_error': self.last_error,
+            'last_holder': self.last_holder
+        }
+
+
+# Models whose changes are visible on a user's dashboard and task views
+USER_VERSIONED_MODELS = (Task, UserPreference, UserActivity)
+
+# Task columns the server recomputes on its own schedule (the hourly rescoring
+# job). Writing only these bumps User.score_version and stamps the task's
+# score_version instead of versioning the task, or every pending task would be
+# handed back whole to every sync client every hour.
+SERVER_COMPUTED_TASK_FIELDS = frozenset({'ml_priority_score'})
+
+
+def _owner_id(obj):
+    if obj.user_id is not None:
+        return obj.user_id
+    owner = getattr(obj, 'user', None)
+    return owner.id if owner is not None else None
+
+
+def _only_server_computed(obj):
+    if not isinstance(obj, Task):
+        return False
+    state = inspect(obj)
+    return all(
+        name in SERVER_COMPUTED_TASK_FIELDS
+        for name in state.committed_state if state.attrs[name].history.has_changes()
+    )
+
+
+def _bump_user_counter(session, column, user_ids):
+    """
+    Increment a counter column of users.
+
+    Returns:
+        dict: User id -> new counter value
+    """
+    # Core statement on the flush's connection, so no autoflush is triggered
+    users = User.__table__
+    counter = users.c[column]
+    connection = session.connection()
+    bump = update(users).where(users.c.id.in_(user_ids)).values({column: counter + 1})
+    if connection.dialect.update_returning:
+        return dict(connection.execute(bump.returning(users.c.id, counter)).all())
+    connection.execute(bump)
+    return dict(connection.execute(select(users.c.id, counter).where(users.c.id.in_(user_ids))).all())
+
+
+@event.listens_for(Session, 'before_flush')
+def bump_user_data_versions(session, flush_context, instances):
+    """
+    Increment User.data_version for every user whose data is being written.
+    
+    Written tasks are stamped with the new version and deleted tasks leave a
+    TaskTombstone, which is what the delta sync endpoint reads. Tasks whose
+    only change is a server-computed score bump User.score_version instead,
+    and are stamped with it.
+    """
+    changed = list(session.new) + list(session.deleted)
+    rescored = []
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            (rescored if _only_server_computed(obj) else changed).append(obj)
+    
+    if rescored:
+        score_versions = _bump_user_counter(session, 'score_version', {task.user_id for task in rescored})
+        for task in rescored:
+            task.score_version = score_versions[task.user_id]
+    
+    user_ids = set()
+    tasks = []
+    for obj in changed:
+        if isinstance(obj, USER_VERSIONED_MODELS):
+            user_id = _owner_id(obj)
+            if user_id is not None:
+                user_ids.add(user_id)
+                if isinstance(obj, Task):
+                    tasks.append((user_id, obj))
+    
+    if not user_ids:
+        return
+    
+    versions = _bump_user_counter(session, 'data_version', user_ids)
+    
+    for user_id, task in tasks:
+        if task in session.deleted:
+            if task.id is not None:
+                session.add(TaskTombstone(task_id=task.id, user_id=user_id, version=versions[user_id]))
+        else:
+            task.version = versions[user_id]
+
+
+ROLLUP_FIELDS = ('user_id', 'created_at', 'category', 'status', 'completed_at')
+
+
+def rollup_contribution(user_id, created_at, category, status, completed_at):
+    """
+    What one task adds to ProductivityRollup.
+    
+    Returns:
+        tuple: ((user_id, day, category), (total, completed, hours, completion_count))
+    """
+    key = (user_id, created_at.date(), category or '')
+    if status != 'completed':
+        return key, (1, 0, 0.0, 0)
+    if completed_at is None:
+        return key, (1, 1, 0.0, 0)
+    hours = (completed_at - created_at).total_seconds() / 3600
+    return key, (1, 1, hours, 1)
+
+
+def upsert_rollups(connection, deltas):
+    """
+    Add deltas to ProductivityRollup rows, creating missing rows.
+    
+    Args:
+        connection: Connection to execute on
+        deltas: Dict of (user_id, day, category) -> (total, completed, hours, completion_count)
+    """
+    table = ProductivityRollup.__table__
+    rows = [
+        {
+            'user_id': user_id, 'day': day, 'category': category,
+            'total_tasks': total, 'completed_tasks': completed,
+            'completion_hours_sum': hours, 'completion_count': count
+        }
+        for (user_id, day, category), (total, completed, hours, count) in deltas.items()
+    ]
+    if not rows:
+        return
+    
+    counters = ('total_tasks', 'completed_tasks', 'completion_hours_sum', 'completion_count')
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert_ = (sqlite if dialect == 'sqlite' else postgresql).insert
+        for row in rows:
+            stmt = insert_(table).values(row)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=['user_id', 'day', 'category'],
+                set_={name: table.c[name] + stmt.excluded[name] for name in counters}
+            ))
+        return
+    
+    # Other databases: update, then insert the rows that didn't exist
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(table.c.user_id == row['user_id'], table.c.day == row['day'], table.c.category == row['category'])
+            .values({name: table.c[name] + row[name] for name in counters})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(row))
+
+
+@event.listens_for(Session, 'before_flush')
+def maintain_productivity_rollups(session, flush_context, instances):
+    """Stamp Task.completed_at on status changes and keep ProductivityRollup in step."""
+    now = datetime.utcnow()
+    added, removed = [], []
+    
+    for task in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(task, Task):
+            continue
+        
+        is_new = task in session.new
+        is_deleted = task in session.deleted
+        state = inspect(task)
+        if not (is_new or is_deleted) and not any(state.attrs[field].history.has_changes() for field in ROLLUP_FIELDS):
+            continue
+        
+        if not is_deleted:
+            # The status change is the completion event
+            if task.status == 'completed' and task.completed_at is None:
+                task.completed_at = now
+            elif task.status != 'completed' and task.completed_at is not None:
+                task.completed_at = None
+            if task.created_at is None:
+                task.created_at = now
+            user_id = _owner_id(task)
+            if user_id is not None:
+                added.append(rollup_contribution(user_id, task.created_at, task.category, task.status, task.completed_at))
+        
+        if not is_new and task.id is not None:
+            removed.append(task.id)
+    
+    if not added and not removed:
+        return
+    
+    connection = session.connection()
+    
+    # What changed and deleted tasks contributed so far, read from the database
+    # rather than attribute history so unloaded columns don't matter
+    if removed:
+        tasks = Task.__table__
+        rows = connection.execute(
+            select(*[tasks.c[field] for field in ROLLUP_FIELDS]).where(tasks.c.id.in_(removed))
+        ).all()
+    else:
+        rows = []
+    
+    deltas = {}
+    for sign, contributions in ((1, added), (-1, [rollup_contribution(*row) for row in rows if row.created_at])):
+        for key, values in contributions:
+            current = deltas.get(key, (0, 0, 0.0, 0))
+            deltas[key] = tuple(c + sign * v for c, v in zip(current, values))
+    
+    upsert_rollups(connection, {key: values for key, values in deltas.items() if any(values)})
+
+
+_TITLE_WORD = re.compile(r'[^\W_]+')
+
+
+def title_trigrams(title):
+    """
+    The distinct trigrams of a title, pg_trgm style: lowercase words padded
+    with two leading spaces and one trailing space.
+    
+    Returns:
+        set: Three-character strings
+    """
+    trigrams = set()
+    for word in _TITLE_WORD.findall(title.lower()):
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+@event.listens_for(Session, 'after_flush')
+def maintain_task_title_index(session, flush_context):
+    """Keep TaskTitleTrigram in step with inserted, retitled and deleted tasks."""
+    stale, fresh = [], []
+    # Session.new and .deleted build a new collection on every access
+    new, deleted = set(session.new), set(session.deleted)
+    
+    for task in list(new) + list(session.dirty) + list(deleted):
+        if not isinstance(task, Task) or task.id is None:
+            continue
+        
+        is_new = task in new
+        is_deleted = task in deleted
+        if not is_new:
+            state = inspect(task)
+            if not is_deleted and not (state.attrs.title.history.has_changes() or state.attrs.user_id.history.has_changes()):
+                continue
+            stale.append(task.id)
+        if not is_deleted:
+            user_id = _owner_id(task)
+            if user_id is not None and task.title:
+                fresh.extend(
+                    {'user_id': user_id, 'trigram': trigram, 'task_id': task.id}
+                    for trigram in title_trigrams(task.title)
+                )
+    
+    if not stale and not fresh:
+        return
+    
+    table = TaskTitleTrigram.__table__
+    connection = session.connection()
+    if stale:
+        connection.execute(delete(table).where(table.c.task_id.in_(stale)))
+    if fresh:
+        connection.execute(table.insert(), fresh)
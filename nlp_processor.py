@@ -1,52 +1,82 @@
-import spacy
+import copy
+import os
+import sys
+import threading
+import time
 import logging
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
 import re
 
+from date_grammar import extract_dates_times
+from keyword_matcher import KeywordMatcher
+from nlp_server import NLPServerUnavailable
+
 logger = logging.getLogger(__name__)
 
-# Load the English NLP model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    # If the model isn't found, download it
-    import subprocess
-    subprocess.call([
-        "python", "-m", "spacy", "download", "en_core_web_sm"
-    ])
-    nlp = spacy.load("en_core_web_sm")
-
-# Define patterns for date and time extraction
-DATE_PATTERNS = [
-    r'today',
-    r'tomorrow',
-    r'next (monday|tuesday|wednesday|thursday|friday|saturday|sunday)',
-    r'(monday|tuesday|wednesday|thursday|friday|saturday|sunday)',
-    r'next week',
-    r'next month',
-    r'(\d{1,2})(?:st|nd|rd|th)?[ ,-]*(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|aug(?:ust)?|sep(?:tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)(?:[ ,-]*(\d{4}))?',
-    r'(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?',
-]
+# spaCy package name or path of an installed model. The model is not
+# downloaded by the app: install it with `python -m spacy download en_core_web_sm`
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_sm")
 
-TIME_PATTERNS = [
-    r'(\d{1,2})(?::(\d{2}))?[ ]*(am|pm)?',
-    r'(\d{1,2})(?::(\d{2}))?[ ]*(a\.m\.|p\.m\.)?',
-    r'(\d{1,2})(?::(\d{2}))?[ ]*(a|p)?',
-    r'at (\d{1,2})(?::(\d{2}))?[ ]*(am|pm)?',
-    r'morning',
-    r'afternoon',
-    r'evening',
-    r'noon',
-    r'midnight',
-]
+# Components never used by this module, left out when the model is loaded
+EXCLUDED_COMPONENTS = ['lemmatizer']
+
+# Components each kind of parse skips. 'tokens' only runs the tokenizer.
+# Ordered from the cheapest to the most complete parse.
+PIPELINE_PROFILES = {
+    'tokens': None,
+    'syntax': ['ner'],   # parser and tagger for verbs and objects
+    'full': [],          # syntax plus entities for categories
+}
+PROFILE_ORDER = list(PIPELINE_PROFILES)
+
+# Unix socket of a shared NLP server (nlp_server.py). When set, texts are
+# parsed there and this process never loads the model.
+NLP_SERVER_SOCKET = os.environ.get("NLP_SERVER_SOCKET")
+
+_nlp = None
+_nlp_lock = threading.Lock()
+_client = None
+
+
+def get_nlp():
+    """
+    Load the spaCy model on first use.
+
+    Importing spaCy and loading a model takes hundreds of milliseconds and
+    MB, so processes that never parse text (CLI commands, the scheduler)
+    don't pay for it.
+
+    Raises:
+        RuntimeError: If the model isn't installed
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                try:
+                    _nlp = spacy.load(SPACY_MODEL, exclude=EXCLUDED_COMPONENTS)
+                except OSError as e:
+                    raise RuntimeError(
+                        f"spaCy model '{SPACY_MODEL}' is not installed. Install it with "
+                        f"`python -m spacy download {SPACY_MODEL}` or point SPACY_MODEL at a model path."
+                    ) from e
+                logger.info(f"Loaded spaCy model {SPACY_MODEL} with pipeline {_nlp.pipe_names}")
+    return _nlp
+
+
+def get_nlp_client():
+    """The client for the shared NLP server, or None when parsing locally."""
+    global _client
+    if NLP_SERVER_SOCKET and _client is None:
+        with _nlp_lock:
+            if _client is None:
+                from nlp_server import NLPClient
+                _client = NLPClient(NLP_SERVER_SOCKET)
+    return _client
 
-DURATION_PATTERNS = [
-    r'for (\d+) min(?:ute(?:s)?)?',
-    r'for (\d+) hour(?:s)?',
-    r'for (\d+) day(?:s)?',
-    r'for (\d+) week(?:s)?',
-    r'for (\d+) month(?:s)?',
-]
 
 PRIORITY_KEYWORDS = {
     'high': ['urgent', 'important', 'critical', 'asap', 'high priority', 'essential', 'vital'],
@@ -54,24 +84,282 @@ PRIORITY_KEYWORDS = {
     'low': ['low priority', 'minor', 'trivial', 'when possible', 'not urgent']
 }
 
-# Mapping of day names to their index in a week (0-6, where 0 is Monday)
-DAY_NAME_TO_INDEX = {
-    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-    'friday': 4, 'saturday': 5, 'sunday': 6
-}
+# Phrases that identify each command type, checked in order
+INTENT_PHRASES = [
+    ('create_task', [
+        'add task', 'create task', 'new task', 'schedule', 'remind me',
+        'set up', 'plan', 'organize', 'arrange'
+    ]),
+    ('list_tasks', [
+        'show task', 'show all task', 'list task', 'view task',
+        'what are my task', 'display task', 'get task', 'show my task'
+    ]),
+    ('update_task', [
+        'update task', 'change task', 'modify task', 'edit task',
+        'reschedule', 'postpone', 'move task', 'mark as complete',
+        'mark done', 'finish task', 'complete task'
+    ]),
+    ('delete_task', [
+        'delete task', 'remove task', 'cancel task', 'eliminate task'
+    ]),
+    ('analytics', [
+        'analyze', 'productivity', 'statistics', 'progress', 'report',
+        'how am i doing', 'my performance', 'task completion'
+    ]),
+    ('preferences', [
+        'settings', 'preferences', 'set preference', 'update preference',
+        'change my', 'working hours', 'notification', 'configure'
+    ]),
+    ('help', [
+        'help', 'how to', 'instructions', 'guide me', 'tutorial', 'what can you do'
+    ]),
+    ('calendar_sync', [
+        'sync calendar', 'connect calendar', 'google calendar', 'link calendar'
+    ]),
+]
+
+# Category words for new tasks, in order of preference
+CATEGORY_WORDS = ["work", "personal", "health", "meeting", "appointment", "project",
+                  "family", "social", "education", "finance", "shopping", "travel"]
+
+# Other phrases that command branches check for
+COMMAND_WORDS = [
+    'today', 'tomorrow', 'this week', 'next week', 'this month', 'all time',
+    'high priority', 'important', 'complete', 'done', 'finish',
+    'working hours', 'notification', 'email', 'reminder', 'break'
+]
+
+
+def _build_keyword_matcher():
+    # Every phrase table in one automaton, so a message is scanned once
+    matcher = KeywordMatcher()
+    for command_type, phrases in INTENT_PHRASES:
+        for phrase in phrases:
+            matcher.add(phrase, ('intent', command_type))
+    for level, words in PRIORITY_KEYWORDS.items():
+        for word in words:
+            matcher.add(word, ('priority', level))
+    for word in CATEGORY_WORDS:
+        matcher.add(word, ('category', word))
+    for word in COMMAND_WORDS:
+        matcher.add(word, ('word', word))
+    return matcher.build()
+
+
+KEYWORDS = _build_keyword_matcher()
+
+LIST_CATEGORY_REGEX = re.compile(r'\b(work|personal|health|meeting|project|social)\b')
+
+
+class CommandPipeline:
+    """
+    One message on its way through the NLP stages.
+
+    The lowercase text, the spaCy Doc and the date/time matches are each
+    computed once, when a stage first needs them, and shared by the stages
+    after it. Wall time per stage is accumulated in timings (seconds).
+    """
+
+    def __init__(self, processor, text, now=None):
+        self.processor = processor
+        self.text = text
+        self.lower = text.lower()
+        self.now = now or datetime.now()
+        self.result = None
+        self.timings = {}
+        self._doc = None
+        self._doc_profile = None
+        self._dates_times = None
+        self._keywords = None
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def doc(self, profile):
+        """The spaCy Doc of the text, parsed with at least the given profile."""
+        if self._doc is None or PROFILE_ORDER.index(profile) > PROFILE_ORDER.index(self._doc_profile):
+            with self.stage('parse'):
+                self._doc = self.processor._parse(self.text, profile)
+            self._doc_profile = profile
+        return self._doc
+
+    def keywords(self, kind):
+        """
+        Phrases of one kind ('intent', 'priority', 'category', 'word') found
+        in the text, mapped to the position of their first occurrence.
+        """
+        if self._keywords is None:
+            with self.stage('keywords'):
+                self._keywords = {}
+                for start, _, _, tags in KEYWORDS.find_all(self.lower):
+                    for tag_kind, key in tags:
+                        self._keywords.setdefault(tag_kind, {}).setdefault(key, start)
+        return self._keywords.get(kind, {})
+
+    def use_doc(self, doc, profile):
+        """Use a Doc parsed elsewhere (e.g. by nlp.pipe) with the given profile."""
+        self._doc = doc
+        self._doc_profile = profile
+
+    def dates_times(self):
+        """Dates, times and duration found in the text."""
+        if self._dates_times is None:
+            with self.stage('dates'):
+                self._dates_times = extract_dates_times(self.lower, self.now)
+        return self._dates_times
+
+
+def _size_of(value):
+    # Rough memory footprint of a cached result
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size_of(k) + _size_of(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class ParseCache:
+    """
+    Bounded LRU cache of understood commands.
+
+    Entries are keyed by the message with its whitespace normalized and the
+    reference date, since relative dates ("tomorrow", "friday") resolve
+    against the day the message is read. Case is kept: the parser reads
+    "Acme" and "acme" differently, so they may not share a result. Both the number of entries and their estimated size are capped.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (result, size)
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(command):
+        return (" ".join(command.text.split()), command.now.date())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers may modify the result they get
+        return copy.deepcopy(entry[0])
+
+    def put(self, key, result):
+        if not self.max_entries:
+            return
+        result = copy.deepcopy(result)
+        size = _size_of(key[0]) + _size_of(result)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self.size_bytes += size
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
 
 
 class NLPProcessor:
-    def __init__(self):
-        self.nlp = nlp
+    def __init__(self, cache_size=10000, cache_max_bytes=8 * 1024 * 1024):
+        self.cache = ParseCache(cache_size, cache_max_bytes)
         logger.debug("NLP processor initialized")
+
+    def _parse(self, text, profile):
+        """
+        Run the spaCy pipeline with only the components a call site needs.
+
+        Args:
+            text: Text to parse
+            profile: Key of PIPELINE_PROFILES
+        """
+        client = get_nlp_client()
+        if client is not None:
+            try:
+                return client.parse([text], profile)[0]
+            except NLPServerUnavailable as e:
+                logger.warning(f"Parsing locally: {str(e)}")
+
+        nlp = get_nlp()
+        disabled = PIPELINE_PROFILES[profile]
+        if disabled is None:
+            return nlp.make_doc(text)
+        return nlp(text, disable=[name for name in disabled if name in nlp.pipe_names])
     
-    def extract_task_info(self, text):
+    def extract_task_info(self, text, now=None):
         """
         Extract task information from natural language text.
         Returns a dictionary with extracted task details.
         """
-        doc = self.nlp(text.lower())
+        return self._task_info(CommandPipeline(self, text, now))
+
+    def extract_task_infos(self, texts, now=None, batch_size=64, n_process=1):
+        """
+        Extract task information from many texts, parsing them as one stream.
+
+        spaCy's nlp.pipe batches the texts through the pipeline, and with
+        n_process > 1 spreads the batches over worker processes (each loads
+        its own copy of the model, so this only pays off for large imports).
+        With a shared NLP server, batches are sent there instead.
+
+        Args:
+            texts: List of task descriptions
+            now: Reference time for relative dates (defaults to datetime.now())
+            batch_size: Texts per spaCy batch
+            n_process: Number of parsing processes
+
+        Returns:
+            list: One task data dictionary per text, in order
+        """
+        now = now or datetime.now()
+        client = get_nlp_client()
+        docs = None
+        if client is not None:
+            try:
+                docs = [
+                    doc for start in range(0, len(texts), batch_size)
+                    for doc in client.parse(texts[start:start + batch_size], 'full')
+                ]
+            except NLPServerUnavailable as e:
+                logger.warning(f"Parsing locally: {str(e)}")
+        if docs is None:
+            nlp = get_nlp()
+            disabled = [name for name in PIPELINE_PROFILES['full'] if name in nlp.pipe_names]
+            docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disabled)
+
+        results = []
+        for text, doc in zip(texts, docs):
+            command = CommandPipeline(self, text, now)
+            command.use_doc(doc, 'full')
+            results.append(self._task_info(command))
+        return results
+
+    def _task_info(self, command):
+        doc = command.doc('full')
         
         # Initialize task data dictionary
         task_data = {
@@ -86,35 +374,36 @@ class NLPProcessor:
         }
         
         # Extract task title (using the main verb and its direct object)
-        verbs = [token for token in doc if token.pos_ == "VERB"]
-        if verbs:
-            main_verb = verbs[0]
-            # Get the verb phrase and its object
-            obj_text = ""
-            for token in doc:
-                if token.head == main_verb and token.dep_ in ["dobj", "pobj"]:
-                    # Get the entire object phrase
-                    obj_phrase = [t for t in token.subtree]
-                    obj_text = " ".join([t.text for t in sorted(obj_phrase, key=lambda t: t.i)])
-                    break
-            
-            if obj_text:
-                task_data['title'] = f"{main_verb.text} {obj_text}"
-            else:
-                # If no direct object found, use the verb and next few tokens
-                verb_idx = main_verb.i
-                title_end = min(verb_idx + 5, len(doc))
-                task_data['title'] = " ".join([t.text for t in doc[verb_idx:title_end]])
-        
-        # If no title was extracted, use first few tokens of the input
-        if not task_data['title']:
-            task_data['title'] = " ".join([t.text for t in doc[:min(6, len(doc))]])
+        with command.stage('title'):
+            verbs = [token for token in doc if token.pos_ == "VERB"]
+            if verbs:
+                main_verb = verbs[0]
+                # Get the verb phrase and its object
+                obj_text = ""
+                for token in doc:
+                    if token.head == main_verb and token.dep_ in ["dobj", "pobj"]:
+                        # Get the entire object phrase
+                        obj_phrase = [t for t in token.subtree]
+                        obj_text = " ".join([t.lower_ for t in sorted(obj_phrase, key=lambda t: t.i)])
+                        break
+
+                if obj_text:
+                    task_data['title'] = f"{main_verb.lower_} {obj_text}"
+                else:
+                    # If no direct object found, use the verb and next few tokens
+                    verb_idx = main_verb.i
+                    title_end = min(verb_idx + 5, len(doc))
+                    task_data['title'] = " ".join([t.lower_ for t in doc[verb_idx:title_end]])
+
+            # If no title was extracted, use first few tokens of the input
+            if not task_data['title']:
+                task_data['title'] = " ".join([t.lower_ for t in doc[:min(6, len(doc))]])
         
         # Extract the description (use the whole text as a starting point)
-        task_data['description'] = text
+        task_data['description'] = command.text
         
         # Extract dates and times
-        dates_times = self._extract_dates_times(text)
+        dates_times = command.dates_times()
         if 'due_date' in dates_times:
             task_data['due_date'] = dates_times['due_date']
         if 'start_time' in dates_times:
@@ -125,214 +414,111 @@ class NLPProcessor:
             task_data['duration'] = dates_times['duration']
         
         # Extract priority
-        task_data['priority'] = self._extract_priority(text)
+        with command.stage('priority'):
+            task_data['priority'] = self._extract_priority(command)
         
         # Extract category using entity recognition
-        categories = []
-        for ent in doc.ents:
-            if ent.label_ in ["ORG", "PRODUCT", "EVENT", "WORK_OF_ART"]:
-                categories.append(ent.text)
-        
-        # Also look for common category words
-        category_words = ["work", "personal", "health", "meeting", "appointment", "project", 
-                         "family", "social", "education", "finance", "shopping", "travel"]
-        for word in category_words:
-            if word in text.lower():
-                categories.append(word)
-        
-        if categories:
-            task_data['category'] = categories[0]  # Use the first identified category
+        with command.stage('category'):
+            categories = []
+            for ent in doc.ents:
+                if ent.label_ in ["ORG", "PRODUCT", "EVENT", "WORK_OF_ART"]:
+                    categories.append(ent.text.lower())
+
+            # Also look for common category words
+            found = command.keywords('category')
+            categories.extend(word for word in CATEGORY_WORDS if word in found)
+
+            if categories:
+                task_data['category'] = categories[0]  # Use the first identified category
         
         return task_data
     
-    def _extract_dates_times(self, text):
-        """Extract dates and times from the text"""
-        text = text.lower()
-        result = {}
-        
-        # Current date/time for reference
-        now = datetime.now()
-        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Extract dates
-        for pattern in DATE_PATTERNS:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                date_str = match.group(0)
-                
-                if 'today' in date_str:
-                    extracted_date = today
-                elif 'tomorrow' in date_str:
-                    extracted_date = today + timedelta(days=1)
-                elif 'next ' in date_str and any(day in date_str for day in DAY_NAME_TO_INDEX.keys()):
-                    # Handle "next Monday", "next Tuesday", etc.
-                    for day_name in DAY_NAME_TO_INDEX.keys():
-                        if day_name in date_str:
-                            days_ahead = DAY_NAME_TO_INDEX[day_name] - today.weekday()
-                            if days_ahead <= 0:  # Target day is today or earlier this week
-                                days_ahead += 7  # Go to next week
-                            extracted_date = today + timedelta(days=days_ahead)
-                            break
-                elif any(day in date_str for day in DAY_NAME_TO_INDEX.keys()):
-                    # Handle just "Monday", "Tuesday", etc.
-                    for day_name in DAY_NAME_TO_INDEX.keys():
-                        if day_name in date_str:
-                            days_ahead = DAY_NAME_TO_INDEX[day_name] - today.weekday()
-                            if days_ahead <= 0:  # Target day is today or earlier this week
-                                days_ahead += 7  # Go to next week
-                            extracted_date = today + timedelta(days=days_ahead)
-                            break
-                elif 'next week' in date_str:
-                    # Next Monday
-                    days_until_next_week = 7 - today.weekday()
-                    extracted_date = today + timedelta(days=days_until_next_week)
-                elif 'next month' in date_str:
-                    if now.month == 12:
-                        extracted_date = now.replace(year=now.year+1, month=1, day=1)
-                    else:
-                        extracted_date = now.replace(month=now.month+1, day=1)
-                else:
-                    # Try to parse specific date formats
-                    try:
-                        # Will need more complex parsing for various date formats
-                        # This is a simplified version
-                        if re.match(r'(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?', date_str):
-                            parts = re.match(r'(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?', date_str)
-                            month = int(parts.group(1))
-                            day = int(parts.group(2))
-                            year = int(parts.group(3)) if parts.group(3) else now.year
-                            if year < 100:  # Handle two-digit years
-                                year = 2000 + year if year < 50 else 1900 + year
-                            extracted_date = datetime(year, month, day)
-                        else:
-                            continue
-                    except:
-                        continue
-                
-                if 'due_date' not in result:
-                    result['due_date'] = extracted_date
-                elif 'start_time' not in result:
-                    result['start_time'] = extracted_date
-        
-        # Extract times
-        time_matches = []
-        for pattern in TIME_PATTERNS:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                time_str = match.group(0)
-                time_matches.append((time_str, match.span()))
-        
-        # Sort time matches by position in text
-        time_matches.sort(key=lambda x: x[1][0])
-        
-        # Process time matches
-        for i, (time_str, _) in enumerate(time_matches):
-            try:
-                hour, minute = 0, 0
-                
-                if 'morning' in time_str:
-                    hour, minute = 9, 0
-                elif 'afternoon' in time_str:
-                    hour, minute = 14, 0
-                elif 'evening' in time_str:
-                    hour, minute = 18, 0
-                elif 'noon' in time_str:
-                    hour, minute = 12, 0
-                elif 'midnight' in time_str:
-                    hour, minute = 0, 0
-                else:
-                    # Parse HH:MM format
-                    hour_match = re.search(r'(\d{1,2})', time_str)
-                    if hour_match:
-                        hour = int(hour_match.group(1))
-                        minute_match = re.search(r':(\d{2})', time_str)
-                        minute = int(minute_match.group(1)) if minute_match else 0
-                        
-                        # Handle AM/PM
-                        if 'pm' in time_str.lower() or 'p.m.' in time_str.lower() or ' p' in time_str.lower():
-                            if hour < 12:
-                                hour += 12
-                        elif ('am' in time_str.lower() or 'a.m.' in time_str.lower() or ' a' in time_str.lower()) and hour == 12:
-                            hour = 0
-                
-                # Set the time on the appropriate date
-                time_date = result.get('due_date', today)
-                time_datetime = time_date.replace(hour=hour, minute=minute)
-                
-                if i == 0 and 'start_time' not in result:
-                    result['start_time'] = time_datetime
-                elif i == 1 or 'end_time' not in result:
-                    result['end_time'] = time_datetime
-            except:
-                continue
-        
-        # Extract duration
-        for pattern in DURATION_PATTERNS:
-            match = re.search(pattern, text)
-            if match:
-                duration_value = int(match.group(1))
-                if 'minute' in match.group(0):
-                    result['duration'] = duration_value
-                elif 'hour' in match.group(0):
-                    result['duration'] = duration_value * 60
-                elif 'day' in match.group(0):
-                    result['duration'] = duration_value * 24 * 60
-                break
-        
-        # If we have a start time and duration but no end time, calculate the end time
-        if 'start_time' in result and 'duration' in result and 'end_time' not in result:
-            result['end_time'] = result['start_time'] + timedelta(minutes=result['duration'])
-        
-        return result
-    
-    def _extract_priority(self, text):
-        """Extract priority level from text"""
-        text_lower = text.lower()
+    def _extract_priority(self, command):
+        """Extract priority level from the command's priority keywords"""
+        found = command.keywords('priority')
         
         # Check for explicit priority indications
-        if any(word in text_lower for word in PRIORITY_KEYWORDS['high']):
+        if 'high' in found:
             return 5
-        elif any(word in text_lower for word in PRIORITY_KEYWORDS['medium']):
+        elif 'medium' in found:
             return 3
-        elif any(word in text_lower for word in PRIORITY_KEYWORDS['low']):
+        elif 'low' in found:
             return 1
         
         # Default priority if none specified
         return 0
     
-    def understand_command(self, text):
+    def understand_command(self, text, now=None):
         """
         Understand the type of command the user is giving.
         Returns a dictionary with command type and relevant extracted info.
         """
-        text_lower = text.lower()
-        result = {'command_type': 'unknown', 'data': {}}
+        return self.analyze(text, now).result
+
+    def analyze(self, text, now=None):
+        """
+        Run a message through the NLP pipeline.
+
+        Args:
+            text: The user's message
+            now: Reference time for relative dates (defaults to datetime.now())
+
+        Returns:
+            CommandPipeline: The understood command in result, with per-stage timings
+        """
+        command = CommandPipeline(self, text, now)
+        key = ParseCache.key(command)
+        with command.stage('cache'):
+            cached = self.cache.get(key)
+        if cached is not None:
+            if 'description' in cached['data']:
+                cached['data']['description'] = text
+            command.result = cached
+            return command
+
+        command.result = self._understand(command)
+        self.cache.put(key, command.result)
+        return command
+
+    def _classify_intent(self, command):
+        found = command.keywords('intent')
+        for command_type, _ in INTENT_PHRASES:
+            if command_type in found:
+                return command_type
+        return 'unknown'
+
+    def _object_phrase(self, command):
+        # Object of the first verb or preposition, as a potential task title
+        doc = command.doc('syntax')
+        with command.stage('title'):
+            for token in doc:
+                if token.dep_ in ['dobj', 'pobj']:
+                    return " ".join([t.text for t in token.subtree])
+        return None
+
+    def _understand(self, command):
+        text_lower = command.lower
+        words = command.keywords('word')
+        with command.stage('intent'):
+            command_type = self._classify_intent(command)
+        result = {'command_type': command_type, 'data': {}}
         
-        # Check for task creation commands
-        if any(phrase in text_lower for phrase in [
-            'add task', 'create task', 'new task', 'schedule', 'remind me', 
-            'set up', 'plan', 'organize', 'arrange'
-        ]):
-            result['command_type'] = 'create_task'
-            result['data'] = self.extract_task_info(text)
+        # Task creation commands
+        if command_type == 'create_task':
+            result['data'] = self._task_info(command)
         
-        # Check for task listing/viewing commands
-        elif any(phrase in text_lower for phrase in [
-            'show task', 'show all task', 'list task', 'view task', 
-            'what are my task', 'display task', 'get task', 'show my task'
-        ]):
-            result['command_type'] = 'list_tasks'
-            
+        # Task listing/viewing commands
+        elif command_type == 'list_tasks':
             # Check for filtering criteria
-            if 'today' in text_lower:
+            if 'today' in words:
                 result['data']['timeframe'] = 'today'
-            elif 'tomorrow' in text_lower:
+            elif 'tomorrow' in words:
                 result['data']['timeframe'] = 'tomorrow'
-            elif 'this week' in text_lower:
+            elif 'this week' in words:
                 result['data']['timeframe'] = 'this_week'
-            elif 'next week' in text_lower:
+            elif 'next week' in words:
                 result['data']['timeframe'] = 'next_week'
-            elif 'high priority' in text_lower or 'important' in text_lower:
+            elif 'high priority' in words or 'important' in words:
                 result['data']['priority'] = 'high'
             
             # Default to today if no timeframe specified
@@ -340,118 +526,70 @@ class NLPProcessor:
                 result['data']['timeframe'] = 'today'
             
             # Extract category if mentioned
-            doc = self.nlp(text_lower)
-            for token in doc:
-                if token.text in ['work', 'personal', 'health', 'meeting', 'project', 'social']:
-                    result['data']['category'] = token.text
-                    break
-        
+            with command.stage('category'):
+                match = LIST_CATEGORY_REGEX.search(text_lower)
+                if match:
+                    result['data']['category'] = match.group(1)
         
-        # Check for task update commands
-        elif any(phrase in text_lower for phrase in [
-            'update task', 'change task', 'modify task', 'edit task',
-            'reschedule', 'postpone', 'move task', 'mark as complete',
-            'mark done', 'finish task', 'complete task'
-        ]):
-            result['command_type'] = 'update_task'
-            
+        # Task update commands
+        elif command_type == 'update_task':
             # Check for task identification
-            task_title = None
-            doc = self.nlp(text)
-            for token in doc:
-                if token.dep_ in ['dobj', 'pobj']:
-                    # Extract object phrase as potential task title
-                    task_title = " ".join([t.text for t in token.subtree])
-                    break
-            
+            task_title = self._object_phrase(command)
             if task_title:
                 result['data']['task_title'] = task_title
             
             # Check for completion status
-            if any(phrase in text_lower for phrase in ['complete', 'done', 'finish']):
+            if any(phrase in words for phrase in ['complete', 'done', 'finish']):
                 result['data']['status'] = 'completed'
             
             # Check for rescheduling
-            dates_times = self._extract_dates_times(text)
+            dates_times = command.dates_times()
             if dates_times:
                 result['data'].update(dates_times)
         
-        # Check for deletion commands
-        elif any(phrase in text_lower for phrase in [
-            'delete task', 'remove task', 'cancel task', 'eliminate task'
-        ]):
-            result['command_type'] = 'delete_task'
-            
+        # Deletion commands
+        elif command_type == 'delete_task':
             # Try to extract task title to delete
-            task_title = None
-            doc = self.nlp(text)
-            for token in doc:
-                if token.dep_ in ['dobj', 'pobj']:
-                    # Extract object phrase as potential task title
-                    task_title = " ".join([t.text for t in token.subtree])
-                    break
-            
+            task_title = self._object_phrase(command)
             if task_title:
                 result['data']['task_title'] = task_title
         
-        # Check for analytical commands
-        elif any(phrase in text_lower for phrase in [
-            'analyze', 'productivity', 'statistics', 'progress', 'report',
-            'how am i doing', 'my performance', 'task completion'
-        ]):
-            result['command_type'] = 'analytics'
-            
+        # Analytical commands
+        elif command_type == 'analytics':
             # Check for time period
-            if 'today' in text_lower:
+            if 'today' in words:
                 result['data']['timeframe'] = 'today'
-            elif 'this week' in text_lower:
+            elif 'this week' in words:
                 result['data']['timeframe'] = 'this_week'
-            elif 'this month' in text_lower:
+            elif 'this month' in words:
                 result['data']['timeframe'] = 'this_month'
-            elif 'all time' in text_lower:
+            elif 'all time' in words:
                 result['data']['timeframe'] = 'all_time'
             else:
                 result['data']['timeframe'] = 'all_time'  # Default to all time
         
-        # Check for preference setting commands
-        elif any(phrase in text_lower for phrase in [
-            'settings', 'preferences', 'set preference', 'update preference',
-            'change my', 'working hours', 'notification', 'configure'
-        ]):
-            result['command_type'] = 'preferences'
-            
+        # Preference setting commands
+        elif command_type == 'preferences':
             # Extract specific preference settings
-            if 'working hours' in text_lower:
+            if 'working hours' in words:
                 result['data']['preference_type'] = 'working_hours'
-                times = self._extract_dates_times(text)
+                times = command.dates_times()
                 if 'start_time' in times:
                     result['data']['start_time'] = times['start_time']
                 if 'end_time' in times:
                     result['data']['end_time'] = times['end_time']
             
-            elif 'notification' in text_lower:
+            elif 'notification' in words:
                 result['data']['preference_type'] = 'notifications'
-                if 'email' in text_lower:
+                if 'email' in words:
                     result['data']['notification_medium'] = 'email'
-                elif 'reminder' in text_lower:
+                elif 'reminder' in words:
                     result['data']['notification_medium'] = 'reminder'
             
-            elif 'break' in text_lower:
+            elif 'break' in words:
                 result['data']['preference_type'] = 'breaks'
-                times = self._extract_dates_times(text)
+                times = command.dates_times()
                 if 'duration' in times:
                     result['data']['break_duration'] = times['duration']
         
-        # Check for help commands
-        elif any(phrase in text_lower for phrase in [
-            'help', 'how to', 'instructions', 'guide me', 'tutorial', 'what can you do'
-        ]):
-            result['command_type'] = 'help'
-        
-        # Check for calendar sync commands
-        elif any(phrase in text_lower for phrase in [
-            'sync calendar', 'connect calendar', 'google calendar', 'link calendar'
-        ]):
-            result['command_type'] = 'calendar_sync'
-        
         return result
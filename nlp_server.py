@@ -0,0 +1,300 @@
+"""
+Shared spaCy inference server.
+
+Loads the spaCy model once and parses texts for every gunicorn worker over a
+Unix socket, so workers don't each hold a copy of the model. Requests that
+arrive together are micro-batched through nlp.pipe.
+
+    NLP_SERVER_SOCKET=/run/smartscheduler/nlp.sock python nlp_server.py
+
+Workers use the server when NLP_SERVER_SOCKET is set (gunicorn.conf.py starts
+it automatically in that case).
+
+Protocol: every message is a 4-byte big-endian length followed by the body.
+A request is one JSON message {"texts": [...], "profile": "full"}; the reply
+is a JSON header {"ok": true, "lang": "en"} (or {"ok": false, "error": ...})
+followed by the parsed Docs serialized as a spaCy DocBin.
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct('!I')
+
+
+class NLPServerUnavailable(RuntimeError):
+    """The NLP server couldn't be reached."""
+
+
+def send_message(sock, body):
+    sock.sendall(_LENGTH.pack(len(body)) + body)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-message")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock):
+    """Read one message, or return None if the peer closed the connection."""
+    first = sock.recv(1)
+    if not first:
+        return None
+    header = first + _recv_exactly(sock, _LENGTH.size - 1)
+    return _recv_exactly(sock, _LENGTH.unpack(header)[0])
+
+
+class MicroBatcher:
+    """
+    Collects parse requests from many connections and runs them through
+    nlp.pipe together.
+
+    A batch closes when max_texts texts are waiting or max_wait seconds have
+    passed since its first request, whichever comes first.
+    """
+
+    def __init__(self, nlp, profiles, max_texts=256, max_wait=0.002):
+        self.nlp = nlp
+        self.profiles = profiles
+        self.max_texts = max_texts
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='nlp-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, texts, profile):
+        """
+        Queue texts for parsing.
+
+        Returns:
+            Future: Resolves to the serialized DocBin of the parsed texts
+        """
+        if profile not in self.profiles:
+            raise ValueError(f"Unknown pipeline profile '{profile}'")
+        future = Future()
+        self._queue.put((texts, profile, future))
+        return future
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        count = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            count += len(item[0])
+        return batch
+
+    def _run(self):
+        from spacy.tokens import DocBin
+
+        while True:
+            batch = self._next_batch()
+            by_profile = {}
+            for item in batch:
+                by_profile.setdefault(item[1], []).append(item)
+
+            for profile, items in by_profile.items():
+                try:
+                    texts = [text for item in items for text in item[0]]
+                    disabled = self.profiles[profile]
+                    if disabled is None:
+                        docs = [self.nlp.make_doc(text) for text in texts]
+                    else:
+                        docs = list(self.nlp.pipe(
+                            texts,
+                            batch_size=self.max_texts,
+                            disable=[name for name in disabled if name in self.nlp.pipe_names]
+                        ))
+
+                    offset = 0
+                    for item_texts, _, future in items:
+                        future.set_result(DocBin(docs=docs[offset:offset + len(item_texts)]).to_bytes())
+                        offset += len(item_texts)
+                except Exception as e:
+                    logger.error(f"Error parsing batch: {str(e)}")
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # A connection carries any number of requests, one at a time
+        while True:
+            try:
+                body = recv_message(self.request)
+            except ConnectionError:
+                return
+            if body is None:
+                return
+
+            try:
+                request = json.loads(body)
+                payload = self.server.batcher.submit(request['texts'], request.get('profile', 'full')).result()
+                header = {'ok': True, 'lang': self.server.batcher.nlp.lang}
+            except Exception as e:
+                payload = b''
+                header = {'ok': False, 'error': str(e)}
+
+            try:
+                send_message(self.request, json.dumps(header).encode())
+                send_message(self.request, payload)
+            except OSError:
+                return
+
+
+class NLPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # Every worker thread may connect at once; the default backlog of 5 turns
+    # a burst into EAGAIN on the clients' non-blocking connects
+    request_queue_size = socket.SOMAXCONN
+
+    def __init__(self, path, batcher):
+        # Remove a socket left behind by a previous run
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _RequestHandler)
+        os.chmod(path, 0o660)
+        self.batcher = batcher
+
+
+class NLPClient:
+    """
+    Parses texts on the shared NLP server.
+
+    Each thread keeps its own connection. Returned Docs use a blank vocab of
+    the server's language, so the client never loads a model.
+    """
+
+    def __init__(self, path, timeout=30, connect_timeout=5):
+        self.path = path
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._local = threading.local()
+        self._vocabs = {}
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = self._connect()
+            self._local.sock = sock
+        return sock
+
+    def _connect(self):
+        # With a timeout the socket is non-blocking, so a full listen backlog
+        # fails the connect with EAGAIN instead of waiting: back off and retry
+        deadline = time.monotonic() + self.connect_timeout
+        delay = 0.001
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+                return sock
+            except BlockingIOError:
+                sock.close()
+                if time.monotonic() + delay > deadline:
+                    raise
+            except OSError:
+                sock.close()
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _vocab(self, lang):
+        with self._lock:
+            if lang not in self._vocabs:
+                import spacy
+                self._vocabs[lang] = spacy.blank(lang).vocab
+            return self._vocabs[lang]
+
+    def parse(self, texts, profile='full'):
+        """
+        Parse texts on the server.
+
+        Args:
+            texts: List of texts
+            profile: Key of nlp_processor.PIPELINE_PROFILES
+
+        Returns:
+            list: One spaCy Doc per text
+
+        Raises:
+            NLPServerUnavailable: If the server can't be reached
+            RuntimeError: If the server fails to parse
+        """
+        from spacy.tokens import DocBin
+
+        request = json.dumps({'texts': list(texts), 'profile': profile}).encode()
+        # A pooled connection may have gone stale (server restart): retry once on a new one
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, request)
+                header = recv_message(sock)
+                payload = recv_message(sock)
+                if header is None or payload is None:
+                    raise ConnectionError("Connection closed by the NLP server")
+                break
+            except OSError as e:
+                self._close()
+                if attempt:
+                    raise NLPServerUnavailable(f"NLP server at {self.path} is unavailable: {str(e)}") from e
+
+        header = json.loads(header)
+        if not header['ok']:
+            raise RuntimeError(f"NLP server error: {header['error']}")
+        return list(DocBin().from_bytes(payload).get_docs(self._vocab(header['lang'])))
+
+
+def serve(path):
+    from nlp_processor import get_nlp, PIPELINE_PROFILES
+
+    nlp = get_nlp()
+    batcher = MicroBatcher(
+        nlp,
+        PIPELINE_PROFILES,
+        max_texts=int(os.environ.get('NLP_SERVER_MAX_BATCH', 256)),
+        max_wait=float(os.environ.get('NLP_SERVER_BATCH_WAIT', 0.002))
+    )
+    with NLPServer(path, batcher) as server:
+        logger.info(f"NLP server listening on {path}")
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    socket_path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('NLP_SERVER_SOCKET')
+    if not socket_path:
+        sys.exit("Usage: python nlp_server.py SOCKET_PATH (or set NLP_SERVER_SOCKET)")
+    serve(socket_path)
@@ -4,6 +4,7 @@ from threading import Thread
 from flask import render_template
 from flask_mail import Message
 from app import app, mail, db
+from event_stream import event_broker
 from models import Reminder, Task, User, UserPreference
 
 logger = logging.getLogger(__name__)
@@ -17,51 +18,92 @@ class NotificationService:
         """
         Check for due reminders and send notifications.
         
+        Reminders for users who prefer digests are coalesced: every unsent
+        reminder of that user falling within REMINDER_DIGEST_WINDOW minutes
+        is delivered together in a single message as soon as one of them is due.
+        
         Returns:
             int: Number of reminders sent
         """
-        # Find reminders that are due but haven't been sent
         now = datetime.now()
-        due_reminders = Reminder.query.filter(
-            Reminder.remind_at <= now,
-            Reminder.sent == False
-        ).all()
+        window_end = now + timedelta(minutes=app.config.get('REMINDER_DIGEST_WINDOW', 30))
+        
+        # Load pending reminders with their task, user and preferences in one query
+        rows = db.session.query(Reminder, Task, User, UserPreference).join(
+            Task, Reminder.task_id == Task.id
+        ).join(
+            User, Task.user_id == User.id
+        ).outerjoin(
+            UserPreference, UserPreference.user_id == User.id
+        ).filter(
+            Reminder.sent == False,
+            Reminder.remind_at <= window_end
+        ).order_by(User.id, Reminder.remind_at).all()
+        
+        # Group reminders per user
+        by_user = {}
+        for reminder, task, user, user_pref in rows:
+            entry = by_user.setdefault(user.id, {'user': user, 'user_pref': user_pref, 'items': []})
+            entry['items'].append((reminder, task))
         
         sent_count = 0
-        for reminder in due_reminders:
-            success = self.send_reminder(reminder)
-            if success:
-                reminder.sent = True
-                sent_count += 1
+        for entry in by_user.values():
+            user = entry['user']
+            user_pref = entry['user_pref']
+            items = entry['items']
+            
+            # Nothing is due yet for this user, the window only looks ahead
+            if not any(reminder.remind_at <= now for reminder, _ in items):
+                continue
+            
+            if user_pref and user_pref.wants_reminder_digest() and len(items) > 1:
+                if self.send_digest_reminder(user, [task for _, task in items], user_pref):
+                    for reminder, _ in items:
+                        reminder.sent = True
+                    sent_count += len(items)
+                continue
+            
+            for reminder, task in items:
+                if reminder.remind_at > now:
+                    continue
+                if self.send_reminder(reminder, task=task, user=user, user_pref=user_pref):
+                    reminder.sent = True
+                    sent_count += 1
         
         db.session.commit()
         return sent_count
     
-    def send_reminder(self, reminder):
+    def send_reminder(self, reminder, task=None, user=None, user_pref=None):
         """
         Send a specific reminder notification.
         
         Args:
             reminder: The Reminder object
+            task: The associated Task object (optional, looked up if missing)
+            user: The owning User object (optional, looked up if missing)
+            user_pref: The user's UserPreference object (optional, looked up if missing)
             
         Returns:
             bool: True if sent successfully, False otherwise
         """
         try:
             # Get the associated task
-            task = Task.query.get(reminder.task_id)
+            if task is None:
+                task = Task.query.get(reminder.task_id)
             if not task:
                 logger.error(f"Task not found for reminder {reminder.id}")
                 return False
             
             # Get the user
-            user = User.query.get(task.user_id)
+            if user is None:
+                user = User.query.get(task.user_id)
             if not user:
                 logger.error(f"User not found for task {task.id}")
                 return False
             
             # Get user preferences
-            user_pref = UserPreference.query.filter_by(user_id=user.id).first()
+            if user_pref is None:
+                user_pref = UserPreference.query.filter_by(user_id=user.id).first()
             
             # Check notification preferences
             notification_methods = ['email']  # Default
@@ -72,8 +114,9 @@ class NotificationService:
             if 'email' in notification_methods:
                 self.send_email_reminder(user, task)
             
-            # For web notifications, we'll just mark it for display at next page load
-            # This would be implemented on the front-end
+            # Push web notifications to any open browser sessions
+            if 'web' in notification_methods:
+                event_broker.publish(user.id, 'reminder', {'tasks': [task.to_dict()]})
             
             logger.debug(f"Sent reminder for task {task.id} to user {user.id}")
             return True
@@ -81,6 +124,35 @@ class NotificationService:
             logger.error(f"Error sending reminder: {str(e)}")
             return False
     
+    def send_digest_reminder(self, user, tasks, user_pref=None):
+        """
+        Send one notification covering several upcoming tasks.
+        
+        Args:
+            user: The User object
+            tasks: List of Task objects to include in the digest
+            user_pref: The user's UserPreference object (optional)
+            
+        Returns:
+            bool: True if sent successfully, False otherwise
+        """
+        try:
+            notification_methods = ['email']  # Default
+            if user_pref:
+                notification_methods = user_pref.get_notification_preferences()
+            
+            if 'email' in notification_methods:
+                self.send_email_digest(user, tasks)
+            
+            if 'web' in notification_methods:
+                event_broker.publish(user.id, 'reminder', {'tasks': [task.to_dict() for task in tasks]})
+            
+            logger.debug(f"Sent reminder digest of {len(tasks)} tasks to user {user.id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error sending reminder digest: {str(e)}")
+            return False
+    
     def send_email_reminder(self, user, task):
         """
         Send an email reminder for a task.
@@ -123,6 +195,46 @@ class NotificationService:
             logger.error(f"Error creating email reminder: {str(e)}")
             return False
     
+    def send_email_digest(self, user, tasks):
+        """
+        Send a single email reminder listing several tasks.
+        
+        Args:
+            user: The User object
+            tasks: List of Task objects
+            
+        Returns:
+            bool: True if sent successfully, False otherwise
+        """
+        try:
+            subject = f"Reminder: {len(tasks)} upcoming tasks"
+            
+            html_body = f"""
+            <h2>Upcoming Tasks</h2>
+            <p>Hello {user.username},</p>
+            <p>These tasks are starting soon:</p>
+            <ul>
+            """
+            
+            for task in sorted(tasks, key=lambda t: t.start_time or datetime.max):
+                start_time_str = task.start_time.strftime("%I:%M %p") if task.start_time else "Not specified"
+                html_body += f"<li><strong>{start_time_str}:</strong> {task.title} (priority {task.priority}/5)</li>"
+            
+            html_body += """
+            </ul>
+            <p>Log in to your TimeMaster account to view more details or update these tasks.</p>
+            <p>Best regards,<br>TimeMaster AI Assistant</p>
+            """
+            
+            # Send email asynchronously
+            thread = Thread(target=self._send_async_email, args=[user.email, subject, html_body])
+            thread.start()
+            
+            return True
+        except Exception as e:
+            logger.error(f"Error creating email digest: {str(e)}")
+            return False
+    
     def _send_async_email(self, recipient, subject, html_body):
         """
         Send email asynchronously.
@@ -0,0 +1,253 @@
+import bisect
+import hmac
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import request, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds (Prometheus histogram "le" labels)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Endpoints that would only add noise to the histograms
+UNTRACKED_ENDPOINTS = ('static',)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+
+class Histogram:
+    """A Prometheus-style histogram with one series per label combination."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = sorted(self._series.items())
+            series_items = [(labels, list(values)) for labels, values in series_items]
+
+        for label_values, values in series_items:
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                bucket_labels = _format_labels(labels + [('le', bound)])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            lines.append(f"{self.name}_bucket{{{_format_labels(labels + [('le', '+Inf')])}}} {values[-1]}")
+            lines.append(f"{self.name}_sum{{{_format_labels(labels)}}} {values[-2]}")
+            lines.append(f"{self.name}_count{{{_format_labels(labels)}}} {values[-1]}")
+        return lines
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request timing, SQL query counts and component timings.
+
+    Every request gets its wall time, number of SQL statements, time spent
+    executing them and time spent in instrumented components (NLP, ML,
+    calendar) recorded into histograms, exposed in the Prometheus text format.
+    The same breakdown is returned to the client in a Server-Timing header.
+
+    Metrics are per process; with several gunicorn workers each one reports
+    its own share of the traffic.
+    """
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'Wall time of Flask requests.',
+            ('endpoint', 'method', 'status'), LATENCY_BUCKETS
+        )
+        self.sql_queries = Histogram(
+            'http_request_sql_queries', 'SQL statements executed per request.',
+            ('endpoint',), QUERY_COUNT_BUCKETS
+        )
+        self.sql_duration = Histogram(
+            'http_request_sql_duration_seconds', 'Time spent executing SQL per request.',
+            ('endpoint',), LATENCY_BUCKETS
+        )
+        self.component_duration = Histogram(
+            'component_call_duration_seconds', 'Duration of NLP, ML and calendar calls.',
+            ('component', 'method'), LATENCY_BUCKETS
+        )
+        self._collectors = []
+        self._local = threading.local()
+        logger.debug("Request metrics initialized")
+
+    def add_collector(self, collector):
+        """
+        Register a callable that returns extra samples for the metrics page.
+
+        The callable returns a list of (name, type, help, value) tuples.
+        """
+        self._collectors.append(collector)
+
+    def instrument(self, component, obj):
+        """
+        Time every public method of a component object.
+
+        Args:
+            component: Component name used as the metric label
+            obj: The object whose methods are wrapped (in place)
+        """
+        for name in dir(type(obj)):
+            if name.startswith('_') or not callable(getattr(type(obj), name)):
+                continue
+            setattr(obj, name, self._timed(component, name, getattr(obj, name)))
+
+    def _timed(self, component, method_name, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            # Only the outermost call of a component is timed, so methods
+            # calling each other aren't counted twice
+            active = getattr(self._local, 'active', None)
+            if active is None:
+                active = self._local.active = set()
+            if component in active:
+                return method(*args, **kwargs)
+
+            active.add(component)
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                active.discard(component)
+                elapsed = time.perf_counter() - started
+                self.component_duration.observe(elapsed, component, method_name)
+                if has_request_context() and 'perf' in g:
+                    g.perf['components'][component] = g.perf['components'].get(component, 0.0) + elapsed
+        return wrapper
+
+    def record_stages(self, component, timings):
+        """
+        Record stage timings a component measured itself, such as the NLP
+        pipeline's parse and extraction stages.
+
+        Args:
+            component: Component name used as the metric label
+            timings: Dict of stage name -> seconds, recorded as the method label
+        """
+        for stage, seconds in timings.items():
+            self.component_duration.observe(seconds, component, stage)
+            if has_request_context() and 'perf' in g:
+                key = f"{component}-{stage}"
+                g.perf['components'][key] = g.perf['components'].get(key, 0.0) + seconds
+
+    def start_request(self):
+        g.perf = {'started': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0, 'components': {}, 'recorded': False}
+
+    def finish_request(self, status):
+        perf = g.get('perf')
+        if perf is None or perf['recorded']:
+            return None
+        perf['recorded'] = True
+
+        elapsed = time.perf_counter() - perf['started']
+        endpoint = request.endpoint or 'unmatched'
+        self.request_duration.observe(elapsed, endpoint, request.method, str(status))
+        self.sql_queries.observe(perf['sql_count'], endpoint)
+        self.sql_duration.observe(perf['sql_time'], endpoint)
+        return elapsed
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        lines = []
+        for histogram in (self.request_duration, self.sql_queries, self.sql_duration, self.component_duration):
+            lines.extend(histogram.render())
+
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {str(e)}")
+                continue
+            for name, metric_type, help_text, value in samples:
+                lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {value}"])
+
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_times', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get('query_start_times')
+    if not start_times:
+        return
+    started = start_times.pop()
+    # Statements from background threads (scheduler, activity writer) have no request
+    if has_request_context() and 'perf' in g:
+        g.perf['sql_count'] += 1
+        g.perf['sql_time'] += time.perf_counter() - started
+
+
+@app.before_request
+def start_request_metrics():
+    if request.endpoint not in UNTRACKED_ENDPOINTS:
+        request_metrics.start_request()
+
+
+@app.after_request
+def finish_request_metrics(response):
+    perf = g.get('perf')
+    elapsed = request_metrics.finish_request(response.status_code)
+    if elapsed is not None:
+        timings = [f"app;dur={elapsed * 1000:.1f}", f"sql;dur={perf['sql_time'] * 1000:.1f};desc=\"{perf['sql_count']} queries\""]
+        timings += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in sorted(perf['components'].items())]
+        response.headers['Server-Timing'] = ', '.join(timings)
+    return response
+
+
+@app.teardown_request
+def record_failed_request_metrics(exc):
+    # after_request is skipped when the view raised
+    if exc is not None:
+        request_metrics.finish_request(500)
+
+
+def scrape_authorized():
+    """Whether the request carries the METRICS_TOKEN bearer token."""
+    token = app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(header, f"Bearer {token}")
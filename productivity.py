@@ -0,0 +1,113 @@
+import logging
+
+import click
+from sqlalchemy import delete, func, insert, select, update
+
+from app import app, db
+from models import User, Task, ProductivityRollup, rollup_contribution
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_rollups(user_id=None):
+    """
+    Recompute ProductivityRollup from the task table.
+
+    Each user is rebuilt in its own transaction. Bumping the user's
+    data_version first locks the user row, which every incremental rollup
+    update also takes, so concurrent task writes wait instead of racing.
+
+    Args:
+        user_id: Only rebuild this user (optional)
+
+    Returns:
+        int: Number of users rebuilt
+    """
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        with db.engine.connect() as conn:
+            user_ids = conn.execute(select(User.__table__.c.id).order_by(User.__table__.c.id)).scalars().all()
+
+    users = User.__table__
+    tasks = Task.__table__
+    rollups = ProductivityRollup.__table__
+
+    for uid in user_ids:
+        with db.engine.begin() as conn:
+            conn.execute(update(users).where(users.c.id == uid).values(data_version=users.c.data_version + 1))
+
+            totals = {}
+            rows = conn.execute(
+                select(tasks.c.user_id, tasks.c.created_at, tasks.c.category, tasks.c.status, tasks.c.completed_at)
+                .where(tasks.c.user_id == uid, tasks.c.created_at.isnot(None))
+            )
+            for row in rows:
+                key, values = rollup_contribution(*row)
+                current = totals.get(key, (0, 0, 0.0, 0))
+                totals[key] = tuple(c + v for c, v in zip(current, values))
+
+            conn.execute(delete(rollups).where(rollups.c.user_id == uid))
+            if totals:
+                conn.execute(insert(rollups), [
+                    {
+                        'user_id': key[0], 'day': key[1], 'category': key[2],
+                        'total_tasks': total, 'completed_tasks': completed,
+                        'completion_hours_sum': hours, 'completion_count': count
+                    }
+                    for key, (total, completed, hours, count) in totals.items()
+                ])
+
+    logger.info(f"Rebuilt productivity rollups for {len(user_ids)} users")
+    return len(user_ids)
+
+
+def get_productivity_summary(user_id, start_date, end_date):
+    """
+    Summarize task totals and completions for tasks created in a date range.
+
+    Args:
+        user_id: ID of the user
+        start_date: Start of the range (datetime)
+        end_date: End of the range (datetime)
+
+    Returns:
+        dict: Totals, completion rate, average completion time and per-category counts
+    """
+    rows = db.session.query(
+        ProductivityRollup.category,
+        func.sum(ProductivityRollup.total_tasks),
+        func.sum(ProductivityRollup.completed_tasks),
+        func.sum(ProductivityRollup.completion_hours_sum),
+        func.sum(ProductivityRollup.completion_count)
+    ).filter(
+        ProductivityRollup.user_id == user_id,
+        ProductivityRollup.day.between(start_date.date(), end_date.date())
+    ).group_by(ProductivityRollup.category).all()
+
+    total_tasks = completed_tasks = completion_count = 0
+    completion_hours = 0.0
+    categories = {}
+    for category, total, completed, hours, count in rows:
+        total_tasks += total or 0
+        completed_tasks += completed or 0
+        completion_hours += hours or 0.0
+        completion_count += count or 0
+        if category and total:
+            categories[category] = {'total': int(total), 'completed': int(completed or 0)}
+
+    return {
+        'total_tasks': int(total_tasks),
+        'completed_tasks': int(completed_tasks),
+        'completion_rate': round((completed_tasks / total_tasks * 100) if total_tasks else 0),
+        'avg_completion_time_hours': round(completion_hours / completion_count, 1) if completion_count else 0,
+        'categories': categories
+    }
+
+
+@app.cli.command('rebuild-productivity-rollups')
+@click.option('--user-id', type=int, help='Only rebuild this user.')
+def rebuild_rollups_command(user_id):
+    """Backfill the analytics rollup table from the task table."""
+    count = rebuild_rollups(user_id)
+    click.echo(f"Rebuilt productivity rollups for {count} users")
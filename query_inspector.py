@@ -0,0 +1,209 @@
+import logging
+import os
+import re
+import threading
+import traceback
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import request, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Maximum SQL statements per request for each endpoint, checked in development
+# mode and by assert_route_queries in tests. Keep these at what the route needs
+# today: headroom is how N+1 patterns creep back in. The bulk and import APIs
+# are left out, their statement count grows with the batch on SQLite.
+ROUTE_QUERY_BUDGETS = {
+    'login': 2,
+    'logout': 2,
+    'register': 5,
+    'dashboard': 3,
+    'task_list': 3,
+    'view_task': 2,
+    'create_task': 18,
+    'edit_task': 18,
+    'delete_task': 11,
+    'mark_task_complete': 8,
+    'process_command': 18,
+    'preferences': 2,
+    'update_preferences': 5,
+    'optimize_schedule': 6,
+    'update_priorities': 8,
+    'api_list_tasks': 3,
+    'api_get_task': 2,
+    'api_task_changes': 4,
+}
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                 # string literals
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),              # numeric literals
+    (re.compile(r'%\(\w+\)s|:\w+|\$\d+|%s'), '?'),        # named/numbered bind params
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?)'),   # IN lists of any length
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def normalize_statement(statement):
+    """Reduce a SQL statement to its shape, so repeats with different values group together."""
+    for pattern, replacement in _LITERALS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def _call_site():
+    # Innermost frame in the project's own code, outside this module
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(PROJECT_ROOT) and filename != os.path.abspath(__file__) \
+                and os.sep + 'site-packages' + os.sep not in filename:
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.lineno} in {frame.name}"
+    return 'unknown'
+
+
+class QueryRecorder:
+    """Collects the statements executed while it is active, with their call sites."""
+
+    def __init__(self):
+        self.statements = []  # (shape, call site)
+
+    def record(self, statement):
+        self.statements.append((normalize_statement(statement), _call_site()))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeats(self, threshold):
+        """
+        Find statement shapes executed more than threshold times.
+
+        Returns:
+            list: (shape, count, call sites) tuples, most repeated first
+        """
+        grouped = defaultdict(list)
+        for shape, site in self.statements:
+            grouped[shape].append(site)
+        found = [
+            (shape, len(sites), sorted(set(sites)))
+            for shape, sites in grouped.items() if len(sites) > threshold
+        ]
+        return sorted(found, key=lambda item: -item[1])
+
+    def report(self):
+        lines = [f"{self.count} statements:"]
+        for shape, count, sites in self.repeats(0):
+            lines.append(f"  {count}x {shape[:200]}")
+            lines.extend(f"      at {site}" for site in sites)
+        return "\n".join(lines)
+
+
+_local = threading.local()
+
+
+def _active_recorders():
+    if getattr(_local, 'paused', 0):
+        return []
+    recorders = list(getattr(_local, 'recorders', ()))
+    if has_request_context() and 'query_recorder' in g:
+        recorders.append(g.query_recorder)
+    return recorders
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    for recorder in _active_recorders():
+        recorder.record(statement)
+
+
+@contextmanager
+def record_queries():
+    """Record the statements executed by the current thread inside the block."""
+    recorder = QueryRecorder()
+    if not hasattr(_local, 'recorders'):
+        _local.recorders = []
+    _local.recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        _local.recorders.remove(recorder)
+
+
+@contextmanager
+def ignore_queries():
+    """
+    Leave the statements executed by the current thread inside the block out of
+    every recorder, for work a request does on behalf of a background job.
+    """
+    _local.paused = getattr(_local, 'paused', 0) + 1
+    try:
+        yield
+    finally:
+        _local.paused -= 1
+
+
+@contextmanager
+def assert_max_queries(max_queries):
+    """
+    Fail if the block runs more than max_queries SQL statements.
+
+    Intended for tests, e.g. with a Flask test client:
+
+        with assert_max_queries(3):
+            client.get('/dashboard')
+
+    Raises:
+        AssertionError: With every statement shape and its call sites
+    """
+    with record_queries() as recorder:
+        yield recorder
+    if recorder.count > max_queries:
+        raise AssertionError(f"Expected at most {max_queries} queries, got {recorder.report()}")
+
+
+def assert_route_queries(endpoint):
+    """
+    assert_max_queries with the budget of a route, e.g.
+
+        with assert_route_queries('dashboard'):
+            client.get('/dashboard')
+    """
+    return assert_max_queries(ROUTE_QUERY_BUDGETS[endpoint])
+
+
+def _enabled():
+    # Defaults to on when running with debug=True
+    enabled = app.config.get('QUERY_INSPECTOR_ENABLED')
+    return app.debug if enabled is None else enabled
+
+
+@app.before_request
+def start_query_inspection():
+    if _enabled() and request.endpoint != 'static':
+        g.query_recorder = QueryRecorder()
+
+
+@app.after_request
+def finish_query_inspection(response):
+    recorder = g.pop('query_recorder', None)
+    if recorder is None:
+        return response
+
+    threshold = app.config.get('QUERY_REPEAT_THRESHOLD', 3)
+    for shape, count, sites in recorder.repeats(threshold):
+        logger.warning(
+            f"Possible N+1 in {request.endpoint}: {count}x {shape[:200]} at " + "; ".join(sites)
+        )
+
+    budget = ROUTE_QUERY_BUDGETS.get(request.endpoint)
+    if budget is not None and recorder.count > budget:
+        logger.warning(f"{request.endpoint} ran {recorder.count} queries (budget {budget})\n{recorder.report()}")
+
+    response.headers['X-Query-Count'] = str(recorder.count)
+    return response
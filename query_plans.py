@@ -0,0 +1,134 @@
+import sys
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import delete, select
+
+from app import app, db
+from models import Task, TaskTombstone, TaskTitleTrigram, Reminder, UserActivity
+
+
+def hot_queries():
+    """
+    Build the queries that dominate request traffic, with the index each must use.
+
+    Returns:
+        list: (name, statement, expected index name) tuples
+    """
+    now = datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow = today + timedelta(days=1)
+    user_id = 1
+
+    return [
+        ('dashboard_today_tasks',
+         select(Task).where(Task.user_id == user_id, Task.due_date.between(today, tomorrow)),
+         'ix_task_user_due'),
+        ('dashboard_upcoming_tasks',
+         select(Task).where(
+             Task.user_id == user_id,
+             Task.due_date > tomorrow,
+             Task.due_date <= tomorrow + timedelta(days=7),
+             Task.status == 'pending'
+         ).order_by(Task.due_date),
+         'ix_task_user_status_due'),
+        ('task_list_pending',
+         select(Task).where(Task.user_id == user_id, Task.status == 'pending')
+         .order_by(Task.due_date, Task.priority.desc()),
+         'ix_task_user_status_due'),
+        ('analytics_created_range',
+         select(Task).where(Task.user_id == user_id, Task.created_at.between(today - timedelta(days=30), now)),
+         'ix_task_user_created'),
+        ('due_reminders',
+         select(Reminder).where(Reminder.sent == False, Reminder.remind_at <= now),
+         'ix_reminder_unsent_remind_at'),
+        ('task_reminders_delete',
+         delete(Reminder).where(Reminder.task_id == 1),
+         'ix_reminder_task_id'),
+        ('task_completed_activity',
+         select(UserActivity).where(
+             UserActivity.user_id == user_id,
+             UserActivity.activity_type == 'task_completed',
+             UserActivity.details == '1'
+         ),
+         'ix_user_activity_user_type_details'),
+        ('recent_activity',
+         select(UserActivity).where(UserActivity.user_id == user_id)
+         .order_by(UserActivity.timestamp.desc()).limit(5),
+         'ix_user_activity_user_timestamp'),
+        ('task_changes',
+         select(Task).where(Task.user_id == user_id, Task.version > 10)
+         .order_by(Task.version, Task.id).limit(200),
+         'ix_task_user_version'),
+        ('task_tombstones',
+         select(TaskTombstone).where(TaskTombstone.user_id == user_id, TaskTombstone.version > 10)
+         .order_by(TaskTombstone.version, TaskTombstone.task_id).limit(200),
+         'ix_task_tombstone_user_version'),
+        ('task_title_trigrams_delete',
+         delete(TaskTitleTrigram).where(TaskTitleTrigram.task_id.in_([1])),
+         'ix_task_title_trigram_task_id'),
+    ]
+
+
+def explain(statement):
+    """
+    Get the database's query plan for a statement.
+
+    Args:
+        statement: A SQLAlchemy Core statement
+
+    Returns:
+        str: The plan, one line per step
+    """
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+    with db.engine.connect() as conn:
+        if dialect.name == 'sqlite':
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            plan = [row[-1] for row in rows]
+        else:
+            # Small tables favour sequential scans; ask whether an index *can* be used
+            with conn.begin():
+                conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+                rows = conn.exec_driver_sql(f"EXPLAIN {sql}").fetchall()
+            plan = [row[0] for row in rows]
+
+    return "\n".join(plan)
+
+
+def check_query_plans():
+    """
+    Verify each hot query is served by its intended index.
+
+    Returns:
+        list: Dicts with name, expected index, ok flag and plan
+    """
+    results = []
+    for name, statement, expected_index in hot_queries():
+        plan = explain(statement)
+        results.append({
+            'name': name,
+            'index': expected_index,
+            'ok': expected_index in plan,
+            'plan': plan
+        })
+    return results
+
+
+@app.cli.command('check-query-plans')
+@click.option('--verbose', is_flag=True, help='Print every plan, not just failures.')
+def check_query_plans_command(verbose):
+    """Fail if a hot query no longer uses its index (run after `db upgrade`)."""
+    failures = 0
+    for result in check_query_plans():
+        status = 'ok' if result['ok'] else 'FAIL'
+        click.echo(f"[{status}] {result['name']} (expects {result['index']})")
+        if verbose or not result['ok']:
+            click.echo("    " + result['plan'].replace("\n", "\n    "))
+        if not result['ok']:
+            failures += 1
+
+    if failures:
+        click.echo(f"{failures} hot queries are not using their index", err=True)
+        sys.exit(1)
@@ -0,0 +1,225 @@
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from flask import request, g
+
+from app import app
+
+logger = logging.getLogger(__name__)
+
+# Endpoints whose slowest profiles are listed first on /admin/profiles
+PRIORITY_ENDPOINTS = ('process_command', 'update_priorities')
+
+_FILENAME = re.compile(r'^(?P<timestamp>\d{8}T\d{6})_(?P<endpoint>[\w.]+)_(?P<duration>\d+)ms_\w+\.(?P<kind>prof|collapsed)$')
+
+
+class StackSampler:
+    """
+    Statistical profiler: samples one thread's stack at a fixed interval.
+
+    Much cheaper than cProfile on deep call trees (spaCy, scikit-learn), and
+    writes collapsed stacks ("outer;inner count") that flame graph tools read.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """
+    Profiles single production requests on demand.
+
+    A request is profiled when it carries the PROFILE_TOKEN in an
+    X-Profile-Token header, or at random with probability PROFILE_SAMPLE_RATE.
+    The profile (a pstats file from cProfile, or collapsed stacks from the
+    sampler when PROFILE_MODE is 'sample') is written to PROFILE_DIR, with the
+    endpoint and duration in the file name so listing needs no index.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # From Python 3.12 cProfile hooks sys.monitoring, which takes one
+        # profiler per process: a second enable() raises ValueError
+        self._cprofile_lock = threading.Lock()
+        logger.debug("Request profiler initialized")
+
+    @property
+    def profile_dir(self):
+        return app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+
+    def should_profile(self):
+        token = app.config.get('PROFILE_TOKEN')
+        header = request.headers.get('X-Profile-Token')
+        if token and header and hmac.compare_digest(header, token):
+            return True
+        rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        return rate > 0 and random.random() < rate
+
+    def start(self):
+        """
+        Start profiling the current request.
+
+        With cProfile, a request arriving while another one is being profiled
+        isn't profiled.
+
+        Returns:
+            bool: Whether the request is being profiled
+        """
+        if app.config.get('PROFILE_MODE', 'cprofile') == 'sample':
+            profiler = StackSampler(threading.get_ident(), app.config.get('PROFILE_SAMPLE_INTERVAL', 0.005))
+            profiler.start()
+        else:
+            if not self._cprofile_lock.acquire(blocking=False):
+                logger.debug(f"Not profiling {request.endpoint}: another request is being profiled")
+                return False
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # Another profiling tool (e.g. a debugger) holds the hook
+                self._cprofile_lock.release()
+                logger.warning(f"Not profiling {request.endpoint}: {str(e)}")
+                return False
+        g.profiler = (profiler, time.perf_counter())
+        return True
+
+    def _stop(self, profiler):
+        if isinstance(profiler, StackSampler):
+            profiler.stop()
+        else:
+            profiler.disable()
+            self._cprofile_lock.release()
+
+    def finish(self):
+        profiler, started = g.pop('profiler')
+        self._stop(profiler)
+        duration_ms = int((time.perf_counter() - started) * 1000)
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        kind = 'collapsed' if isinstance(profiler, StackSampler) else 'prof'
+        name = (
+            f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}_{request.endpoint or 'unmatched'}"
+            f"_{duration_ms}ms_{uuid.uuid4().hex[:8]}.{kind}"
+        )
+        path = os.path.join(self.profile_dir, name)
+        if isinstance(profiler, StackSampler):
+            profiler.write(path)
+        else:
+            profiler.dump_stats(path)
+        logger.info(f"Wrote request profile {name}")
+
+        self._prune()
+        return name
+
+    def discard(self):
+        """Stop a profile without writing it (the request failed before finishing)."""
+        profiler, _ = g.pop('profiler')
+        self._stop(profiler)
+
+    def list_profiles(self):
+        """
+        List stored profiles: the slowest for priority endpoints first, then
+        everything else, most recent first.
+
+        Returns:
+            list: Dicts with name, endpoint, duration_ms, created_at, kind, size
+        """
+        if not os.path.isdir(self.profile_dir):
+            return []
+
+        profiles = []
+        for name in os.listdir(self.profile_dir):
+            match = _FILENAME.match(name)
+            if not match:
+                continue
+            profiles.append({
+                'name': name,
+                'endpoint': match.group('endpoint'),
+                'duration_ms': int(match.group('duration')),
+                'created_at': datetime.strptime(match.group('timestamp'), '%Y%m%dT%H%M%S').isoformat(),
+                'kind': match.group('kind'),
+                'size': os.path.getsize(os.path.join(self.profile_dir, name))
+            })
+
+        priority = sorted(
+            (p for p in profiles if p['endpoint'] in PRIORITY_ENDPOINTS),
+            key=lambda p: -p['duration_ms']
+        )
+        others = sorted(
+            (p for p in profiles if p['endpoint'] not in PRIORITY_ENDPOINTS),
+            key=lambda p: p['created_at'], reverse=True
+        )
+        return priority + others
+
+    def _prune(self):
+        # Keep the newest PROFILE_MAX_FILES profiles
+        max_files = app.config.get('PROFILE_MAX_FILES', 200)
+        with self._lock:
+            names = sorted(name for name in os.listdir(self.profile_dir) if _FILENAME.match(name))
+            for name in names[:-max_files]:
+                try:
+                    os.remove(os.path.join(self.profile_dir, name))
+                except OSError:
+                    pass
+
+
+request_profiler = RequestProfiler()
+
+
+@app.before_request
+def start_request_profile():
+    if request.endpoint != 'static' and request_profiler.should_profile():
+        request_profiler.start()
+
+
+@app.after_request
+def finish_request_profile(response):
+    if 'profiler' in g:
+        try:
+            response.headers['X-Profile'] = request_profiler.finish()
+        except Exception as e:
+            logger.error(f"Error writing request profile: {str(e)}")
+    return response
+
+
+@app.teardown_request
+def discard_request_profile(exc):
+    if 'profiler' in g:
+        request_profiler.discard()
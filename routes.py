@@ -2,23 +2,56 @@ import logging
 import json
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import render_template, request, redirect, url_for, flash, jsonify, session, abort
+from flask import render_template, request, redirect, url_for, flash, jsonify, session, abort, Response, send_from_directory
 from flask_login import login_user, logout_user, login_required, current_user
 
 from app import app, db, login_manager
-from models import User, Task, UserPreference, UserActivity
+from models import User, Task, UserPreference
 from nlp_processor import NLPProcessor
 from task_scheduler import TaskScheduler
 from ml_prioritizer import MLPrioritizer
 from calendar_integration import CalendarIntegration
 from notification_service import NotificationService
+from event_stream import event_broker
+from job_scheduler import JobScheduler
+from dashboard_service import DashboardService
+from activity_log import ActivityWriter
+from productivity import get_productivity_summary, rebuild_rollups
+from task_title_index import find_task_by_title
+from task_pagination import paginate_tasks, DEFAULT_PAGE_SIZE
+from conditional_get import conditional_on_data_version
+from perf_metrics import request_metrics, scrape_authorized
+from query_inspector import ignore_queries
+from request_profiler import request_profiler
 
 # Initialize components
-nlp_processor = NLPProcessor()
+nlp_processor = NLPProcessor(app.config['NLP_CACHE_SIZE'], app.config['NLP_CACHE_MAX_BYTES'])
 task_scheduler = TaskScheduler()
 ml_prioritizer = MLPrioritizer()
 calendar_integration = CalendarIntegration()
 notification_service = NotificationService()
+job_scheduler = JobScheduler()
+dashboard_service = DashboardService()
+activity_writer = ActivityWriter()
+
+# Time the slow components per request (see /admin/metrics)
+request_metrics.instrument('nlp', nlp_processor)
+request_metrics.instrument('ml', ml_prioritizer)
+request_metrics.instrument('calendar', calendar_integration)
+request_metrics.add_collector(lambda: [
+    ('dashboard_cache_hits_total', 'counter', 'Dashboard cache hits.', dashboard_service.hits),
+    ('dashboard_cache_misses_total', 'counter', 'Dashboard cache misses.', dashboard_service.misses),
+    ('nlp_parse_cache_hits_total', 'counter', 'Assistant commands answered from the parse cache.', nlp_processor.cache.hits),
+    ('nlp_parse_cache_misses_total', 'counter', 'Assistant commands parsed.', nlp_processor.cache.misses),
+    ('nlp_parse_cache_hit_ratio', 'gauge', 'Share of assistant commands answered from the parse cache.', nlp_processor.cache.hit_rate),
+    ('nlp_parse_cache_evictions_total', 'counter', 'Parse cache entries evicted by the size limits.', nlp_processor.cache.evictions),
+    ('nlp_parse_cache_entries', 'gauge', 'Parse cache entries.', len(nlp_processor.cache)),
+    ('nlp_parse_cache_bytes', 'gauge', 'Estimated parse cache size in bytes.', nlp_processor.cache.size_bytes),
+    ('activity_log_written_total', 'counter', 'Activity entries written.', activity_writer.written),
+    ('activity_log_dropped_total', 'counter', 'Activity entries dropped on a full queue.', activity_writer.dropped),
+    ('activity_log_pending', 'gauge', 'Activity entries waiting to be written.', activity_writer.pending_count()),
+    ('event_stream_connections', 'gauge', 'Open Server-Sent Events connections.', event_broker.connection_count()),
+])
 
 logger = logging.getLogger(__name__)
 
@@ -32,10 +65,34 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Check for due reminders every 5 minutes (would be handled by APScheduler in a real app)
+# Periodic jobs, run by whichever worker holds the scheduler lease
+def run_reminder_job():
+    notification_service.check_reminders()
+
+def run_rescoring_job():
+    # Use a fresh prioritizer so a model trained for one user is never applied to another
+    prioritizer = MLPrioritizer()
+    user_ids = [row[0] for row in db.session.query(Task.user_id).filter(Task.status == 'pending').distinct()]
+    for user_id in user_ids:
+        prioritizer.update_all_task_priorities(user_id)
+
+def run_daily_summary_job():
+    for user_pref in UserPreference.query.all():
+        if 'email' in user_pref.get_notification_preferences() and user_pref.user:
+            notification_service.send_daily_summary(user_pref.user)
+
+job_scheduler.add_job('check_reminders', 60, run_reminder_job)
+job_scheduler.add_job('update_priorities', 60 * 60, run_rescoring_job)
+job_scheduler.add_job('daily_summary', 24 * 60 * 60, run_daily_summary_job)
+job_scheduler.add_job('rebuild_productivity_rollups', 24 * 60 * 60, rebuild_rollups)
+job_scheduler.add_job('prune_stream_events', 10 * 60, event_broker.prune)
+
+# Fallback when the background scheduler isn't running (e.g. scheduler disabled):
+# check for due reminders at most every 5 minutes per session. Its queries are the
+# scheduler's work, so they don't count against the route's query budget.
 @app.before_request
 def check_reminders():
-    if not request.endpoint:
+    if not request.endpoint or job_scheduler.is_running():
         return
     
     # Only check on certain routes to avoid checking on every request
@@ -47,19 +104,29 @@ def check_reminders():
     now = datetime.now().timestamp()
     
     if now - last_check > 300:  # 5 minutes in seconds
-        notification_service.check_reminders()
+        with ignore_queries():
+            notification_service.check_reminders()
         session['last_reminder_check'] = now
 
-# Record user activity
+# Record user activity (queued, written in batches by the activity writer)
 def record_activity(activity_type, details=None):
     if current_user.is_authenticated:
-        activity = UserActivity(
-            user_id=current_user.id,
-            activity_type=activity_type,
-            details=details
-        )
-        db.session.add(activity)
-        db.session.commit()
+        activity_writer.record(current_user.id, activity_type, details)
+
+# Whether the client asked for JSON instead of HTML
+def wants_json():
+    if request.args.get('format') == 'json':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return best == 'application/json' and request.accept_mimetypes[best] > request.accept_mimetypes['text/html']
+
+# Push task changes to the user's open browser sessions
+def publish_task_event(action, task_data):
+    if current_user.is_authenticated:
+        event_broker.publish(current_user.id, 'task', {
+            'action': action,
+            'task': task_data
+        })
 
 # Authentication routes
 @app.route('/login', methods=['GET', 'POST'])
@@ -144,66 +211,22 @@ def index():
 
 @app.route('/dashboard')
 @login_required
+@conditional_on_data_version
 def dashboard():
-    # Get today's tasks
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    tomorrow = today + timedelta(days=1)
-    
-    today_tasks = Task.query.filter(
-        Task.user_id == current_user.id,
-        Task.due_date.between(today, tomorrow)
-    ).order_by(Task.start_time).all()
-    
-    # Get upcoming tasks
-    upcoming_tasks = Task.query.filter(
-        Task.user_id == current_user.id,
-        Task.due_date > tomorrow,
-        Task.due_date <= tomorrow + timedelta(days=7),
-        Task.status == 'pending'
-    ).order_by(Task.due_date).all()
-    
-    # Get high priority tasks
-    high_priority_tasks = Task.query.filter(
-        Task.user_id == current_user.id,
-        Task.status == 'pending',
-        Task.priority >= 4
-    ).order_by(Task.due_date).all()
-    
-    # Calculate completion stats
-    completed_today = Task.query.filter(
-        Task.user_id == current_user.id,
-        Task.status == 'completed',
-        Task.due_date.between(today, tomorrow)
-    ).count()
-    
-    total_today = len(today_tasks)
-    completion_rate = round((completed_today / total_today * 100) if total_today > 0 else 0)
-    
-    user_preferences = UserPreference.query.filter_by(user_id=current_user.id).first()
-    
-    # Get user activity
-    recent_activity = UserActivity.query.filter_by(
-        user_id=current_user.id
-    ).order_by(UserActivity.timestamp.desc()).limit(5).all()
+    dashboard_data = dashboard_service.get_dashboard(current_user)
     
     # Add current date for the dashboard
     now = datetime.utcnow()
     
     return render_template(
         'dashboard.html',
-        today_tasks=today_tasks,
-        upcoming_tasks=upcoming_tasks,
-        high_priority_tasks=high_priority_tasks,
-        completion_rate=completion_rate,
-        completed_today=completed_today,
-        total_today=total_today,
-        user_preferences=user_preferences,
-        recent_activity=recent_activity,
-        now=now
+        now=now,
+        **dashboard_data
     )
 
 @app.route('/tasks')
 @login_required
+@conditional_on_data_version
 def task_list():
     status_filter = request.args.get('status', 'pending')
     timeframe = request.args.get('timeframe', 'all')
@@ -228,14 +251,27 @@ def task_list():
     elif timeframe == 'upcoming':
         query = query.filter(Task.due_date >= now)
     
-    # Order by due date and priority
-    tasks = query.order_by(Task.due_date, Task.priority.desc()).all()
+    # Fetch one page ordered by due date and priority
+    cursor = request.args.get('after')
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    try:
+        tasks, next_cursor = paginate_tasks(query, cursor, limit)
+    except ValueError:
+        abort(400)
+    
+    if wants_json():
+        return jsonify({
+            'tasks': [t.to_summary_dict() for t in tasks],
+            'next_cursor': next_cursor
+        })
     
     return render_template(
         'tasks.html',
         tasks=tasks,
         status_filter=status_filter,
-        timeframe=timeframe
+        timeframe=timeframe,
+        cursor=cursor,
+        next_cursor=next_cursor
     )
 
 @app.route('/tasks/create', methods=['GET', 'POST'])
@@ -310,6 +346,7 @@ def create_task():
         db.session.commit()
         
         record_activity('create_task', f"{task.id}")
+        publish_task_event('created', task.to_dict())
         flash('Task created successfully', 'success')
         return redirect(url_for('task_list'))
     
@@ -317,6 +354,7 @@ def create_task():
 
 @app.route('/tasks/<int:task_id>')
 @login_required
+@conditional_on_data_version
 def view_task(task_id):
     task = Task.query.get_or_404(task_id)
     
@@ -412,6 +450,7 @@ def edit_task(task_id):
         db.session.commit()
         
         record_activity('update_task', f"{task.id}")
+        publish_task_event('updated', updated_task.to_dict())
         flash('Task updated successfully', 'success')
         return redirect(url_for('task_list'))
     
@@ -437,11 +476,14 @@ def delete_task(task_id):
     
     # Record the activity before deleting
     record_activity('delete_task', f"{task.title}")
+    task_info = task.to_dict()
     
     # Delete the task
     db.session.delete(task)
     db.session.commit()
     
+    publish_task_event('deleted', task_info)
+    
     flash('Task deleted successfully', 'success')
     return redirect(url_for('task_list'))
 
@@ -458,6 +500,7 @@ def mark_task_complete(task_id):
     db.session.commit()
     
     record_activity('task_completed', f"{task.id}")
+    publish_task_event('updated', task.to_dict())
     
     flash('Task marked as complete', 'success')
     return redirect(url_for('task_list'))
@@ -480,7 +523,9 @@ def process_command():
         })
     
     # Process the input using NLP
-    command_data = nlp_processor.understand_command(user_input)
+    command = nlp_processor.analyze(user_input)
+    request_metrics.record_stages('nlp', command.timings)
+    command_data = command.result
     
     response = {
         'success': True,
@@ -514,6 +559,7 @@ def process_command():
         db.session.commit()
         
         record_activity('create_task_assistant', f"{task.id}")
+        publish_task_event('created', task.to_dict())
         
         # Format response
         time_str = ''
@@ -563,17 +609,11 @@ def process_command():
             response['message'] = "I couldn't determine which task you want to update. Please specify the task title."
             return jsonify(response)
         
-        # Find the task by title (using a simple fuzzy match)
-        tasks = Task.query.filter_by(user_id=current_user.id).all()
-        matching_task = None
-        
-        for task in tasks:
-            if task_title.lower() in task.title.lower():
-                matching_task = task
-                break
+        # Find the task by title through the trigram index
+        matching_task = find_task_by_title(current_user.id, task_title)
         
         if not matching_task:
-            response['message'] = f"I couldn't find a task with title containing '{task_title}'."
+            response['message'] = f"I couldn't find a task with a title like '{task_title}'."
             return jsonify(response)
         
         # Update the task
@@ -597,6 +637,7 @@ def process_command():
         db.session.commit()
         
         record_activity('update_task_assistant', f"{matching_task.id}")
+        publish_task_event('updated', matching_task.to_dict())
         
         response['message'] = f"I've updated the task \"{matching_task.title}\"."
         response['task'] = matching_task.to_dict()
@@ -608,17 +649,11 @@ def process_command():
             response['message'] = "I couldn't determine which task you want to delete. Please specify the task title."
             return jsonify(response)
         
-        # Find the task by title (using a simple fuzzy match)
-        tasks = Task.query.filter_by(user_id=current_user.id).all()
-        matching_task = None
-        
-        for task in tasks:
-            if task_title.lower() in task.title.lower():
-                matching_task = task
-                break
+        # Find the task by title through the trigram index
+        matching_task = find_task_by_title(current_user.id, task_title)
         
         if not matching_task:
-            response['message'] = f"I couldn't find a task with title containing '{task_title}'."
+            response['message'] = f"I couldn't find a task with a title like '{task_title}'."
             return jsonify(response)
         
         # Delete associated calendar event if exists
@@ -638,8 +673,9 @@ def process_command():
         db.session.commit()
         
         record_activity('delete_task_assistant', f"{task_title}")
+        publish_task_event('deleted', task_info)
         
-        response['message'] = f"I've deleted the task \"{task_title}\"."
+        response['message'] = f"I've deleted the task \"{task_info['title']}\"."
         response['deleted_task'] = task_info
     
     elif command_data['command_type'] == 'preferences':
@@ -716,54 +752,13 @@ def process_command():
             start_date = datetime(2000, 1, 1)
             end_date = datetime.now()
         
-        # Get tasks in timeframe
-        tasks = Task.query.filter(
-            Task.user_id == current_user.id,
-            Task.created_at.between(start_date, end_date)
-        ).all()
-        
-        completed_tasks = [t for t in tasks if t.status == 'completed']
-        completion_rate = round((len(completed_tasks) / len(tasks) * 100) if tasks else 0)
-        
-        # Get average time to completion
-        avg_completion_time = 0
-        if completed_tasks:
-            completion_times = []
-            for task in completed_tasks:
-                user_activity = UserActivity.query.filter_by(
-                    user_id=current_user.id,
-                    activity_type='task_completed',
-                    details=str(task.id)
-                ).first()
-                
-                if user_activity and task.created_at:
-                    time_diff = (user_activity.timestamp - task.created_at).total_seconds() / 3600  # hours
-                    completion_times.append(time_diff)
-            
-            if completion_times:
-                avg_completion_time = round(sum(completion_times) / len(completion_times), 1)
-        
-        # Get completion by category
-        categories = {}
-        for task in tasks:
-            if task.category:
-                if task.category not in categories:
-                    categories[task.category] = {'total': 0, 'completed': 0}
-                
-                categories[task.category]['total'] += 1
-                if task.status == 'completed':
-                    categories[task.category]['completed'] += 1
+        # Read the pre-aggregated daily rollups instead of every task in the timeframe
+        analytics = get_productivity_summary(current_user.id, start_date, end_date)
         
         # Format response
         timeframe_str = timeframe.replace('_', ' ')
         response['message'] = f"Here's your productivity report for {timeframe_str}:"
-        response['analytics'] = {
-            'total_tasks': len(tasks),
-            'completed_tasks': len(completed_tasks),
-            'completion_rate': completion_rate,
-            'avg_completion_time_hours': avg_completion_time,
-            'categories': categories
-        }
+        response['analytics'] = analytics
     
     elif command_data['command_type'] == 'calendar_sync':
         # Get authorization URL for Google Calendar
@@ -796,9 +791,29 @@ def process_command():
     
     return jsonify(response)
 
+# Live notification stream (Server-Sent Events)
+@app.route('/api/events')
+@login_required
+def event_stream():
+    # 204 tells EventSource to stop reconnecting
+    if not app.config['LIVE_EVENTS_ENABLED']:
+        return Response(status=204)
+    
+    user_id = current_user.id
+    subscription = event_broker.subscribe(user_id)
+    
+    response = Response(
+        event_broker.stream(user_id, subscription),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering
+    return response
+
 # Calendar integration routes
 @app.route('/preferences')
 @login_required
+@conditional_on_data_version
 def preferences():
     user_pref = UserPreference.query.filter_by(user_id=current_user.id).first()
     
@@ -860,6 +875,11 @@ def update_preferences():
     if notification_prefs:
         user_pref.set_notification_preferences(notification_prefs)
     
+    # Update reminder delivery mode
+    reminder_delivery = request.form.get('reminder_delivery')
+    if reminder_delivery in ('single', 'digest'):
+        user_pref.reminder_delivery = reminder_delivery
+    
     db.session.commit()
     
     record_activity('update_preferences')
@@ -971,6 +991,39 @@ def update_priorities():
     record_activity('update_priorities')
     return redirect(url_for('dashboard'))
 
+@app.route('/admin/jobs')
+@login_required
+@admin_required
+def admin_jobs():
+    return jsonify(job_scheduler.get_status())
+
+@app.route('/admin/metrics')
+def admin_metrics():
+    # Prometheus scrapes with the METRICS_TOKEN bearer token, admins can open it in a browser
+    if scrape_authorized():
+        return metrics_response()
+    return admin_metrics_page()
+
+@login_required
+@admin_required
+def admin_metrics_page():
+    return metrics_response()
+
+def metrics_response():
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profiles')
+@login_required
+@admin_required
+def admin_profiles():
+    return jsonify({'profiles': request_profiler.list_profiles()})
+
+@app.route('/admin/profiles/<path:name>')
+@login_required
+@admin_required
+def download_profile(name):
+    return send_from_directory(request_profiler.profile_dir, name, as_attachment=True)
+
 # Error handlers
 @app.errorhandler(404)
 def page_not_found(e):
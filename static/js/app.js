@@ -57,8 +57,107 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Initialize assistant if it exists
     initializeAssistant();
+    
+    // Subscribe to live notifications for logged-in users
+    initializeLiveUpdates();
 });
 
+// Live notifications over Server-Sent Events
+function initializeLiveUpdates() {
+    const eventsUrl = document.body.dataset.eventsUrl;
+    if (!eventsUrl || !window.EventSource) return;
+    
+    // EventSource reconnects on its own using the server-provided retry delay
+    const source = new EventSource(eventsUrl);
+    
+    source.addEventListener('reminder', function(e) {
+        const data = JSON.parse(e.data);
+        data.tasks.forEach(function(task) {
+            const startTime = task.start_time ? new Date(task.start_time).toLocaleTimeString([], {hour: '2-digit', minute:'2-digit'}) : '';
+            showLiveToast('Reminder', `${escapeHtml(task.title)} ${startTime ? 'starts at ' + startTime : 'is coming up'}`, `/tasks/${task.id}`);
+            
+            if (window.Notification && Notification.permission === 'granted') {
+                new Notification('Task reminder', { body: task.title });
+            }
+        });
+    });
+    
+    source.addEventListener('task', function(e) {
+        const data = JSON.parse(e.data);
+        const task = data.task;
+
+        if (data.action === 'bulk') {
+            // Too many rows may have changed to patch, offer a reload instead
+            showLiveToast('Tasks updated', `${task.created} created, ${task.updated} updated, ${task.deleted} deleted`, window.location.pathname);
+            return;
+        }
+
+        const row = document.querySelector(`tr[data-task-id="${task.id}"]`);
+
+        if (data.action === 'deleted') {
+            if (row) row.remove();
+            return;
+        }
+        
+        if (row) {
+            // Refresh the visible row in place
+            const titleCell = row.querySelector('.task-title');
+            if (titleCell) {
+                titleCell.textContent = task.title;
+                titleCell.classList.toggle('text-decoration-line-through', task.status === 'completed');
+            }
+            const statusBadge = row.querySelector('.task-status');
+            if (statusBadge) {
+                const color = task.status === 'completed' ? 'success' : task.status === 'cancelled' ? 'danger' : 'warning';
+                statusBadge.className = `badge task-status bg-${color}`;
+                statusBadge.textContent = task.status.charAt(0).toUpperCase() + task.status.slice(1);
+            }
+            row.classList.toggle('table-active', task.status === 'completed');
+        } else if (data.action === 'created') {
+            showLiveToast('New task', escapeHtml(task.title), `/tasks/${task.id}`);
+        }
+    });
+    
+    // Ask once for permission to show desktop notifications
+    if (window.Notification && Notification.permission === 'default') {
+        Notification.requestPermission();
+    }
+}
+
+function showLiveToast(heading, body, link) {
+    let container = document.getElementById('live-toast-container');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'live-toast-container';
+        container.className = 'toast-container position-fixed bottom-0 end-0 p-3';
+        document.body.appendChild(container);
+    }
+    
+    const toastDiv = document.createElement('div');
+    toastDiv.className = 'toast';
+    toastDiv.setAttribute('role', 'alert');
+    toastDiv.innerHTML = `
+        <div class="toast-header">
+            <i class="bi bi-bell me-2"></i>
+            <strong class="me-auto">${heading}</strong>
+            <button type="button" class="btn-close" data-bs-dismiss="toast" aria-label="Close"></button>
+        </div>
+        <div class="toast-body">
+            ${body}
+            ${link ? `<a href="${link}" class="ms-2">View</a>` : ''}
+        </div>
+    `;
+    container.appendChild(toastDiv);
+    
+    const toast = new bootstrap.Toast(toastDiv, { delay: 10000 });
+    toastDiv.addEventListener('hidden.bs.toast', () => toastDiv.remove());
+    toast.show();
+}
+
+function escapeHtml(text) {
+    return String(text).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+}
+
 // Assistant chat functionality
 function initializeAssistant() {
     const assistantContainer = document.getElementById('assistant-container');
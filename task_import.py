@@ -0,0 +1,148 @@
+import logging
+
+from flask import render_template, request, jsonify, flash
+from flask_login import login_required, current_user
+
+from app import app
+from api import API_PREFIX, MAX_BULK_OPERATIONS, DATETIME_FIELDS, process_bulk_operations
+from routes import nlp_processor
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of lines accepted in one import
+MAX_IMPORT_LINES = MAX_BULK_OPERATIONS
+
+MAX_TITLE_LENGTH = 120
+
+
+def read_import_lines(text):
+    """
+    Split pasted or uploaded text into task lines.
+
+    Blank lines and lines starting with '#' are skipped.
+
+    Returns:
+        list: (line number, text) tuples
+    """
+    lines = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            lines.append((number, line))
+    return lines
+
+
+def _task_fields(task_data):
+    # Serialize extracted task data into the bulk API's task payload
+    fields = {
+        'title': task_data['title'][:MAX_TITLE_LENGTH],
+        'description': task_data['description'],
+        'priority': task_data['priority'],
+        'category': task_data['category'],
+    }
+    for field in DATETIME_FIELDS:
+        if task_data.get(field):
+            fields[field] = task_data[field].isoformat()
+    if task_data.get('duration'):
+        fields['duration'] = task_data['duration']
+    return fields
+
+
+def import_tasks(user, lines, sync_calendar=True):
+    """
+    Create one task per line of natural language.
+
+    The lines are parsed as one spaCy stream, then scheduled and inserted in
+    a single transaction by the bulk API.
+
+    Args:
+        user: The User object
+        lines: (line number, text) tuples from read_import_lines
+        sync_calendar: Whether to push the new tasks to Google Calendar
+
+    Returns:
+        list: One result per line with line, text, status and the task or an error message
+    """
+    texts = [text for _, text in lines]
+    task_infos = nlp_processor.extract_task_infos(
+        texts,
+        batch_size=app.config.get('NLP_IMPORT_BATCH_SIZE', 64),
+        n_process=app.config.get('NLP_IMPORT_PROCESSES', 1)
+    )
+
+    operations = [{'op': 'create', 'task': _task_fields(info)} for info in task_infos]
+    results = process_bulk_operations(user, operations, sync_calendar=sync_calendar)
+
+    for (number, text), result in zip(lines, results):
+        del result['index'], result['op']
+        result['line'] = number
+        result['text'] = text
+    return results
+
+
+def _read_request_text():
+    # An uploaded file, form field, JSON body or plain text body
+    upload = request.files.get('file')
+    if upload and upload.filename:
+        return upload.read().decode('utf-8', errors='replace')
+    if request.form.get('text'):
+        return request.form['text']
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        if isinstance(payload.get('lines'), list):
+            return "\n".join(str(line) for line in payload['lines'])
+        return payload.get('text') or ''
+    return request.get_data(as_text=True)
+
+
+@app.route(f'{API_PREFIX}/tasks/import', methods=['POST'])
+@login_required
+def api_import_tasks():
+    """
+    Create tasks from lines of natural language, e.g.
+
+        {"lines": ["call dentist tomorrow 3pm", "submit report friday"]}
+
+    Also accepts {"text": "..."}, a text/plain body or a multipart 'file'.
+    Each line is reported with its own status; valid lines are committed together.
+    """
+    lines = read_import_lines(_read_request_text())
+
+    if not lines:
+        return jsonify({'success': False, 'message': 'No tasks to import'}), 400
+    if len(lines) > MAX_IMPORT_LINES:
+        return jsonify({
+            'success': False,
+            'message': f"At most {MAX_IMPORT_LINES} lines are allowed per import"
+        }), 400
+
+    payload = request.get_json(silent=True)
+    sync_calendar = payload.get('sync_calendar', True) if isinstance(payload, dict) else True
+    results = import_tasks(current_user, lines, sync_calendar=sync_calendar)
+
+    return jsonify({
+        'success': all(r['status'] == 'ok' for r in results),
+        'results': results
+    })
+
+
+@app.route('/tasks/import', methods=['GET', 'POST'])
+@login_required
+def import_tasks_page():
+    results = None
+
+    if request.method == 'POST':
+        lines = read_import_lines(_read_request_text())
+        if not lines:
+            flash('Paste or upload at least one task.', 'warning')
+        elif len(lines) > MAX_IMPORT_LINES:
+            flash(f'At most {MAX_IMPORT_LINES} lines can be imported at once.', 'danger')
+        else:
+            results = import_tasks(current_user, lines)
+            imported = sum(1 for r in results if r['status'] == 'ok')
+            if imported == len(results):
+                flash(f'Imported {imported} tasks.', 'success')
+            else:
+                flash(f'Imported {imported} of {len(results)} tasks.', 'warning')
+
+    return render_template('import_tasks.html', results=results, max_lines=MAX_IMPORT_LINES)
@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+
+from models import Task
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Columns needed to render a task row; description is left unloaded
+LIST_COLUMNS = (
+    Task.id, Task.title, Task.due_date, Task.start_time, Task.end_time,
+    Task.priority, Task.status, Task.category, Task.user_id
+)
+
+
+def encode_cursor(task):
+    """
+    Encode the sort key of the last task on a page as an opaque cursor.
+
+    Args:
+        task: The last Task object of the page
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    key = [
+        task.due_date.isoformat() if task.due_date else None,
+        task.priority,
+        task.id
+    ]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string
+
+    Returns:
+        tuple: (due_date or None, priority, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        due_date, priority, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (
+            datetime.fromisoformat(due_date) if due_date else None,
+            int(priority),
+            int(task_id)
+        )
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _after(priority, task_id):
+    # Rows following (priority, id) within the same due date, ordered by -priority, id
+    return or_(
+        Task.priority < priority,
+        and_(Task.priority == priority, Task.id > task_id)
+    )
+
+
+def paginate_tasks(query, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of tasks ordered by (due_date, -priority, id), NULL due dates last.
+
+    Each page is a range scan on the (user_id, [status,] due_date, priority DESC, id)
+    indexes, so its cost doesn't grow with the number of tasks before it.
+    Tasks with a due date and tasks without one are read as two separate ranges
+    so the index order can be used on every database.
+
+    Args:
+        query: A Task query with the user and filter criteria applied
+        cursor: Cursor of the previous page's last task (optional)
+        limit: Page size
+
+    Returns:
+        tuple: (list of Task objects, next cursor or None)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    query = query.options(load_only(*LIST_COLUMNS))
+
+    due_date = priority = task_id = None
+    in_undated = False
+    if cursor:
+        due_date, priority, task_id = decode_cursor(cursor)
+        in_undated = due_date is None
+
+    tasks = []
+
+    # Range 1: tasks with a due date
+    if not in_undated:
+        dated = query.filter(Task.due_date.isnot(None))
+        if due_date is not None:
+            dated = dated.filter(
+                Task.due_date >= due_date,
+                or_(Task.due_date > due_date, _after(priority, task_id))
+            )
+        # Fetch one extra row to know whether another page exists
+        tasks = dated.order_by(Task.due_date, Task.priority.desc(), Task.id).limit(limit + 1).all()
+
+    # Range 2: tasks without a due date, only once the dated range is exhausted
+    if len(tasks) <= limit:
+        undated = query.filter(Task.due_date.is_(None))
+        if in_undated:
+            undated = undated.filter(_after(priority, task_id))
+        tasks += undated.order_by(Task.priority.desc(), Task.id).limit(limit + 1 - len(tasks)).all()
+
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+    next_cursor = encode_cursor(tasks[-1]) if has_more and tasks else None
+
+    return tasks, next_cursor
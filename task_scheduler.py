@@ -21,6 +21,31 @@ class TaskScheduler:
         Returns:
             task: The created Task object
         """
+        user_prefs = UserPreference.query.filter_by(user_id=user.id).first()
+        task = self.build_task(user, task_data, user_prefs)
+        
+        # Add to database
+        db.session.add(task)
+        db.session.commit()
+        
+        # Create reminder for the task
+        self.create_reminder(task, user)
+        
+        return task
+    
+    def build_task(self, user, task_data, user_prefs):
+        """
+        Create a Task from the provided data, filling in missing times from
+        user preferences. Nothing is written to the database.
+        
+        Args:
+            user: The user object
+            task_data: Dictionary with task details
+            user_prefs: The user's UserPreference object, or None
+            
+        Returns:
+            task: The new, unsaved Task object
+        """
         # Create a new task
         task = Task(
             title=task_data.get('title', 'Untitled Task'),
@@ -30,6 +55,7 @@ class TaskScheduler:
             start_time=task_data.get('start_time'),
             end_time=task_data.get('end_time'),
             priority=task_data.get('priority', 0),
+            status=task_data.get('status', 'pending'),
             category=task_data.get('category')
         )
         
@@ -50,7 +76,6 @@ class TaskScheduler:
         # If no times are specified but we have a due date, 
         # use user preferences to suggest a time
         if not task.start_time and task.due_date:
-            user_prefs = UserPreference.query.filter_by(user_id=user.id).first()
             if user_prefs:
                 # Get user's preferred working hours
                 working_start = user_prefs.working_hours_start
@@ -114,13 +139,6 @@ class TaskScheduler:
                     )
                     task.end_time = task.start_time + timedelta(minutes=user_prefs.preferred_task_duration)
         
-        # Add to database
-        db.session.add(task)
-        db.session.commit()
-        
-        # Create reminder for the task
-        self.create_reminder(task, user)
-        
         return task
     
     def reschedule_task(self, task, new_data):
@@ -134,6 +152,24 @@ class TaskScheduler:
         Returns:
             task: The updated Task object
         """
+        self.apply_task_updates(task, new_data)
+        
+        # Update database
+        db.session.commit()
+        
+        # Update reminders for the task
+        self.update_reminders(task)
+        
+        return task
+    
+    def apply_task_updates(self, task, new_data):
+        """
+        Apply updated task details to a Task without committing.
+        
+        Args:
+            task: The Task object to update
+            new_data: Dictionary with updated task details
+        """
         # Update the task with new data
         if 'due_date' in new_data:
             task.due_date = new_data['due_date']
@@ -155,14 +191,6 @@ class TaskScheduler:
         # If we have a duration but no end time, calculate end time
         if 'duration' in new_data and task.start_time and not task.end_time:
             task.end_time = task.start_time + timedelta(minutes=new_data['duration'])
-        
-        # Update database
-        db.session.commit()
-        
-        # Update reminders for the task
-        self.update_reminders(task)
-        
-        return task
     
     def optimize_schedule(self, user_id, date=None):
         """
@@ -380,6 +408,33 @@ class TaskScheduler:
                     db.session.commit()
                     logger.debug(f"Updated reminder for task {task.id} at {remind_at}")
     
+    def replace_reminders(self, tasks):
+        """
+        Recreate the reminders of many tasks at once, without committing.
+        
+        Args:
+            tasks: List of flushed Task objects
+        """
+        task_ids = [task.id for task in tasks]
+        if not task_ids:
+            return
+        
+        # Delete existing reminders for all tasks in one statement
+        Reminder.query.filter(Reminder.task_id.in_(task_ids)).delete(synchronize_session=False)
+        
+        reminder_offset = 30  # minutes
+        now = datetime.now()
+        reminders = []
+        for task in tasks:
+            if task.status != 'pending' or not task.start_time:
+                continue
+            remind_at = task.start_time - timedelta(minutes=reminder_offset)
+            if remind_at > now:
+                reminders.append(Reminder(task_id=task.id, remind_at=remind_at, type='email'))
+        
+        db.session.add_all(reminders)
+        logger.debug(f"Replaced reminders for {len(task_ids)} tasks ({len(reminders)} created)")
+    
     def get_tasks_for_timeframe(self, user_id, timeframe='today'):
         """
         Get tasks for a specific timeframe.
@@ -0,0 +1,118 @@
+from sqlalchemy import and_, or_
+
+from models import Task, TaskTombstone
+
+DEFAULT_CHANGES_LIMIT = 200
+MAX_CHANGES_LIMIT = 1000
+
+
+def encode_sync_cursor(version, task_id, score_version):
+    # An infinite task id (after a bare version cursor) is left empty
+    return f"{version}.{'' if task_id == float('inf') else task_id}.{score_version}"
+
+
+def decode_sync_cursor(cursor):
+    """
+    Decode a cursor produced by encode_sync_cursor.
+
+    A bare version number is accepted too and means "everything after it".
+    Cursors without a score version (from before scores were synced) start
+    at score version 0.
+
+    Args:
+        cursor: Cursor string
+
+    Returns:
+        tuple: (version, task id, score version)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        version, _, rest = cursor.partition('.')
+        task_id, _, score_version = rest.partition('.')
+        return int(version), int(task_id) if task_id else float('inf'), int(score_version or 0)
+    except (AttributeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _after(model, id_column, version, task_id):
+    # Rows following (version, task id) in change order
+    if task_id == float('inf'):
+        return model.version > version
+    return or_(
+        model.version > version,
+        and_(model.version == version, id_column > task_id)
+    )
+
+
+def get_task_changes(user, cursor=None, limit=DEFAULT_CHANGES_LIMIT):
+    """
+    Get the tasks written and deleted since a sync cursor.
+
+    Every write stamps the task with its user's new data_version, and every
+    delete leaves a tombstone with that version, so (version, task id) orders
+    all changes of a user. Both tables are read with an index range scan from
+    the cursor, making the cost proportional to the number of changes.
+
+    Rescoring doesn't version tasks; it stamps them with the user's new
+    score_version instead. The cursor carries the score version the client
+    has, and the new scores of tasks rescored since are returned on their own.
+
+    Args:
+        user: The User object
+        cursor: Cursor returned by the previous call, None for a full sync
+        limit: Maximum number of changes to return
+
+    Returns:
+        dict: Changed tasks, deleted task IDs, rescored tasks' new scores,
+              the next cursor and whether more changes are waiting
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    user_id = user.id
+    limit = max(1, min(limit or DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT))
+    version, task_id, score_version = decode_sync_cursor(cursor) if cursor else (-1, 0, 0)
+    # Read before the scores, so a rescore in between is sent again next time
+    current_score_version = user.score_version
+
+    tasks = Task.query.filter(
+        Task.user_id == user_id,
+        _after(Task, Task.id, version, task_id)
+    ).order_by(Task.version, Task.id).limit(limit + 1).all()
+
+    tombstones = TaskTombstone.query.filter(
+        TaskTombstone.user_id == user_id,
+        _after(TaskTombstone, TaskTombstone.task_id, version, task_id)
+    ).order_by(TaskTombstone.version, TaskTombstone.task_id).limit(limit + 1).all()
+
+    # Merge both streams in change order and keep the first page
+    changes = sorted(
+        [(t.version, t.id, t) for t in tasks] + [(t.version, t.task_id, None) for t in tombstones],
+        key=lambda change: change[:2]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # A full sync returns every task, scores included
+    scores = []
+    if cursor and current_score_version > score_version:
+        scores = [
+            {'id': rescored_id, 'ml_priority_score': score}
+            for rescored_id, score in Task.query.with_entities(Task.id, Task.ml_priority_score).filter(
+                Task.user_id == user_id,
+                Task.score_version > score_version
+            ).order_by(Task.id)
+        ]
+
+    # With nothing new the client keeps its position
+    position = changes[-1][:2] if changes else (version, task_id)
+
+    return {
+        'tasks': [task.to_dict() for _, _, task in changes if task is not None],
+        'deleted': [deleted_id for _, deleted_id, task in changes if task is None],
+        'scores': scores,
+        'cursor': encode_sync_cursor(*position, current_score_version),
+        'has_more': has_more
+    }
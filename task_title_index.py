@@ -0,0 +1,121 @@
+import logging
+
+import click
+from sqlalchemy import delete, func, insert, select
+
+from app import app, db
+from models import User, Task, TaskTitleTrigram, title_trigrams
+
+logger = logging.getLogger(__name__)
+
+# Tasks sharing the most trigrams with the query that are ranked in Python
+MAX_CANDIDATES = 50
+
+# Minimum share of the query's trigrams found in a title that doesn't contain
+# the query (pg_trgm's default word_similarity threshold). Kept strict because
+# the assistant deletes what it finds.
+MIN_WORD_SIMILARITY = 0.6
+
+
+def find_tasks_by_title(user_id, text, limit=5):
+    """
+    Rank a user's tasks by how well their title matches text.
+
+    Candidates come from the trigram index, so only the id, title and status
+    of the best few tasks are read. Titles containing text rank first, then
+    by trigram similarity, so "buy milk" prefers "Buy milk" over "Buy milk
+    and eggs", and "dentis" still finds "Dentist appointment".
+
+    Args:
+        user_id: ID of the user
+        text: Title, or part of one, as typed by the user
+        limit: Maximum number of matches
+
+    Returns:
+        list: (task id, title, similarity) tuples, best match first; similarity
+              is the Jaccard similarity of the trigram sets, as pg_trgm's similarity()
+    """
+    query = text.lower().strip()
+    query_trigrams = title_trigrams(query)
+    if not query_trigrams:
+        return []
+
+    index = TaskTitleTrigram.__table__
+    shared = func.count().label('shared')
+    candidates = (
+        select(index.c.task_id, shared)
+        .where(index.c.user_id == user_id, index.c.trigram.in_(query_trigrams))
+        .group_by(index.c.task_id)
+        .order_by(shared.desc(), index.c.task_id.desc())
+        .limit(MAX_CANDIDATES)
+        .subquery()
+    )
+    tasks = Task.__table__
+    rows = db.session.execute(
+        select(tasks.c.id, tasks.c.title, tasks.c.status, candidates.c.shared)
+        .join(candidates, tasks.c.id == candidates.c.task_id)
+    ).all()
+
+    ranked = []
+    for task_id, title, status, shared_count in rows:
+        word_similarity = shared_count / len(query_trigrams)
+        similarity = shared_count / (len(query_trigrams) + len(title_trigrams(title)) - shared_count)
+        contains = query in title.lower()
+        if contains or word_similarity >= MIN_WORD_SIMILARITY:
+            ranked.append(((contains, word_similarity, similarity, status == 'pending', task_id), title, similarity))
+
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return [(key[-1], title, similarity) for key, title, similarity in ranked[:limit]]
+
+
+def find_task_by_title(user_id, text):
+    """
+    The user's task that best matches text.
+
+    Returns:
+        Task: The task, or None if no title is close enough
+    """
+    matches = find_tasks_by_title(user_id, text, limit=1)
+    return db.session.get(Task, matches[0][0]) if matches else None
+
+
+def rebuild_title_index(user_id=None):
+    """
+    Recompute TaskTitleTrigram from the task table.
+
+    Args:
+        user_id: Only rebuild this user (optional)
+
+    Returns:
+        int: Number of users rebuilt
+    """
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        with db.engine.connect() as conn:
+            user_ids = conn.execute(select(User.__table__.c.id).order_by(User.__table__.c.id)).scalars().all()
+
+    tasks = Task.__table__
+    index = TaskTitleTrigram.__table__
+
+    for uid in user_ids:
+        with db.engine.begin() as conn:
+            rows = [
+                {'user_id': uid, 'trigram': trigram, 'task_id': task_id}
+                for task_id, title in conn.execute(select(tasks.c.id, tasks.c.title).where(tasks.c.user_id == uid))
+                for trigram in title_trigrams(title or '')
+            ]
+            conn.execute(delete(index).where(index.c.user_id == uid))
+            if rows:
+                conn.execute(insert(index), rows)
+
+    logger.info(f"Rebuilt the task title index for {len(user_ids)} users")
+    return len(user_ids)
+
+
+@app.cli.command('rebuild-title-index')
+@click.option('--user-id', type=int, help='Only rebuild this user.')
+def rebuild_title_index_command(user_id):
+    """Recompute the task title trigram index from the task table."""
+    count = rebuild_title_index(user_id)
+    click.echo(f"Rebuilt the task title index for {count} users")
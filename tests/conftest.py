@@ -0,0 +1,57 @@
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The app reads its configuration at import time
+_db_dir = tempfile.mkdtemp(prefix='timemaster-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ['SCHEDULER_ENABLED'] = '0'
+os.environ['MAIL_DEFAULT_SENDER'] = 'reminders@example.com'
+sys.path.insert(0, ROOT)
+
+from flask_migrate import upgrade  # noqa: E402
+import main  # noqa: E402,F401  (registers every route)
+from app import app as flask_app, db  # noqa: E402
+from models import User, UserPreference  # noqa: E402
+import routes  # noqa: E402
+
+PASSWORD = 'correct horse battery staple'
+
+_usernames = (f"user{i}" for i in itertools.count(1))
+
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config['TESTING'] = True
+    flask_app.extensions['mail'].suppress = True
+    with flask_app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+    yield flask_app
+    routes.activity_writer.stop()
+    routes.event_broker.stop()
+
+
+@pytest.fixture
+def user(app):
+    username = next(_usernames)
+    with app.app_context():
+        user = User(username=username, email=f"{username}@example.com")
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.add(UserPreference(user=user))
+        db.session.commit()
+        return user.id, username
+
+
+@pytest.fixture
+def client(app, user):
+    """A test client logged in as a fresh user."""
+    client = app.test_client()
+    response = client.post('/login', data={'username': user[1], 'password': PASSWORD})
+    assert response.status_code == 302
+    return client
@@ -0,0 +1,138 @@
+"""Every budgeted route stays within ROUTE_QUERY_BUDGETS, with or without the scheduler."""
+from datetime import datetime, timedelta
+
+import pytest
+import spacy
+
+from app import db
+from models import Task, Reminder
+import nlp_processor
+from query_inspector import assert_route_queries
+import routes
+from conftest import PASSWORD
+
+
+@pytest.fixture(params=['scheduler running', 'scheduler disabled'])
+def scheduler(request, monkeypatch):
+    # Without the scheduler, the first request of a session checks reminders itself
+    running = request.param == 'scheduler running'
+    monkeypatch.setattr(routes.job_scheduler, 'is_running', lambda: running)
+    return running
+
+
+@pytest.fixture
+def task_id(app, user):
+    with app.app_context():
+        task = Task(user_id=user[0], title='Prepare quarterly report', priority=3,
+                    due_date=datetime.now() + timedelta(days=2))
+        db.session.add(task)
+        db.session.flush()
+        # A due reminder for the fallback to find
+        db.session.add(Reminder(task_id=task.id, remind_at=datetime.now() - timedelta(minutes=1)))
+        db.session.commit()
+        return task.id
+
+
+def test_dashboard(client, task_id, scheduler):
+    with assert_route_queries('dashboard'):
+        response = client.get('/dashboard')
+    assert response.status_code == 200
+
+
+def test_task_list(client, task_id, scheduler):
+    with assert_route_queries('task_list'):
+        response = client.get('/tasks?status=all')
+    assert response.status_code == 200
+
+
+def test_view_task(client, task_id, scheduler):
+    with assert_route_queries('view_task'):
+        response = client.get(f'/tasks/{task_id}')
+    assert response.status_code == 200
+
+
+def test_create_task(client, task_id, scheduler):
+    form = {'title': 'Call the dentist', 'due_date': '2026-10-21', 'start_time': '09:00',
+            'end_time': '09:30', 'priority': '2'}
+    with assert_route_queries('create_task'):
+        response = client.post('/tasks/create', data=form)
+    assert response.status_code == 302
+
+
+def test_edit_task(client, task_id, scheduler):
+    form = {'title': 'Prepare annual report', 'due_date': '2026-10-22', 'priority': '4', 'status': 'pending'}
+    with assert_route_queries('edit_task'):
+        response = client.post(f'/tasks/{task_id}/edit', data=form)
+    assert response.status_code == 302
+
+
+def test_delete_task(client, task_id, scheduler):
+    with assert_route_queries('delete_task'):
+        response = client.post(f'/tasks/{task_id}/delete')
+    assert response.status_code == 302
+
+
+def test_mark_task_complete(client, task_id, scheduler):
+    with assert_route_queries('mark_task_complete'):
+        response = client.post(f'/tasks/{task_id}/mark-complete')
+    assert response.status_code == 302
+
+
+@pytest.fixture
+def nlp(monkeypatch):
+    # The statement count does not depend on the parse, so a blank pipeline
+    # stands in when the trained model is not installed
+    if not spacy.util.is_package(nlp_processor.SPACY_MODEL):
+        monkeypatch.setattr(nlp_processor, '_nlp', spacy.blank('en'))
+
+
+@pytest.mark.parametrize('message', [
+    'schedule a dentist appointment tomorrow at 3pm',
+    'delete prepare quarterly report',
+])
+def test_process_command(client, task_id, scheduler, nlp, message):
+    with assert_route_queries('process_command'):
+        response = client.post('/api/assistant/process', json={'message': message})
+    assert response.status_code == 200
+
+
+# (route, method, path, form, expected status) for the logged-in routes above
+# that need no setup of their own
+ROUTE_REQUESTS = [
+    ('logout', 'get', '/logout', None, 302),
+    ('preferences', 'get', '/preferences', None, 200),
+    ('update_preferences', 'post', '/preferences/update',
+     {'working_hours_start': '08:30', 'working_hours_end': '17:00', 'break_duration': '10',
+      'peak_start_0': '09:00', 'peak_end_0': '11:00', 'preferred_task_duration': '45',
+      'email_notifications': 'on', 'reminder_delivery': 'digest'}, 302),
+    ('optimize_schedule', 'post', '/optimize-schedule', {'date': '2026-10-21'}, 302),
+    ('update_priorities', 'post', '/update-priorities', None, 302),
+    ('api_list_tasks', 'get', '/api/v1/tasks', None, 200),
+    ('api_get_task', 'get', '/api/v1/tasks/{task_id}', None, 200),
+    ('api_task_changes', 'get', '/api/v1/tasks/changes', None, 200),
+]
+
+
+@pytest.mark.parametrize('route, method, path, form, status', ROUTE_REQUESTS,
+                         ids=[request[0] for request in ROUTE_REQUESTS])
+def test_route(client, task_id, scheduler, route, method, path, form, status):
+    with assert_route_queries(route):
+        response = getattr(client, method)(path.format(task_id=task_id), data=form)
+    assert response.status_code == status
+
+
+def test_login(app, user, scheduler):
+    client = app.test_client()
+    with assert_route_queries('login'):
+        response = client.post('/login', data={'username': user[1], 'password': PASSWORD})
+    assert response.status_code == 302
+
+
+def test_register(app, scheduler):
+    client = app.test_client()
+    username = 'newcomer-' + ('running' if scheduler else 'disabled')
+    form = {'username': username, 'email': f"{username}@example.com",
+            'password': PASSWORD, 'confirm_password': PASSWORD}
+    with assert_route_queries('register'):
+        response = client.post('/register', data=form)
+    assert response.status_code == 302
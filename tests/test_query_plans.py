@@ -0,0 +1,14 @@
+"""Every hot query in query_plans.py is served by its index on the migrated schema."""
+from query_plans import check_query_plans
+
+
+def test_hot_queries_use_their_indexes(app):
+    with app.app_context():
+        results = check_query_plans()
+
+    assert results
+    failures = [
+        f"{result['name']} (expects {result['index']}):\n    " + result['plan'].replace("\n", "\n    ")
+        for result in results if not result['ok']
+    ]
+    assert not failures, "Hot queries not using their index:\n" + "\n".join(failures)